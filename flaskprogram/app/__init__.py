@@ -1,23 +1,48 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
+from app.cache import StatsCache
+from app.metrics import RequestMetrics
+from app.routing import RoutingSession
 
-# 创建数据库和登录管理扩展对象
+# 创建数据库、登录管理、统计缓存和请求性能统计扩展对象
 # 这些对象会在应用工厂函数中与具体的Flask应用实例关联
-db = SQLAlchemy()
+# 会话按请求读写分离：只读请求使用只读连接，写入使用主连接（见 app/routing.py）
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
+stats_cache = StatsCache()
+request_metrics = RequestMetrics()
 
-def create_app():
-    """应用工厂函数，用于创建和配置Flask应用实例"""
+def create_app(config=None):
+    """应用工厂函数，用于创建和配置Flask应用实例；config可覆盖配置文件中的配置（如压测时使用的数据库）"""
     app = Flask(__name__)
 
     # 从配置文件加载应用配置
     # 配置文件通常包含数据库连接信息、密钥等敏感信息
     app.config.from_pyfile('../config.py')
+    if config:
+        app.config.update(config)
+
+    # SQLite连接使用可统计读取行数的游标，需在创建数据库引擎之前设置
+    request_metrics.configure(app)
+
+    # 启用读写分离时添加只读连接，需在创建数据库引擎之前设置
+    from app import routing
+    routing.configure(app)
+
+    # 数据库文件或数据库服务器设置连接池大小（内存数据库除外），需在创建数据库引擎之前设置
+    from app import pragmas
+    pragmas.configure(app)
 
     # 初始化关联
     db.init_app(app)
 
+    # 每个新建的SQLite连接执行生产环境PRAGMA（WAL日志、synchronous=NORMAL、busy_timeout等）
+    pragmas.init_app(app)
+
+    # 只读连接开启query_only，禁止写入
+    routing.init_app(app)
+
     # 初始化登录管理扩展
     login_manager.init_app(app)
 
@@ -25,6 +50,24 @@ def create_app():
     # 当用户需要登录时，Flask-Login会重定向到这个端点对应的视图函数
     login_manager.login_view = 'main.login'
 
+    # 初始化统计缓存（成绩、学生、课程数据提交后自动失效）
+    stats_cache.init_app(app)
+
+    # 初始化请求性能统计（每个请求的SQL语句数、数据库耗时和返回行数，写入Server-Timing响应头）
+    request_metrics.init_app(app)
+
+    # 初始化Prometheus监控指标（各路由耗时、SQL语句数及数据库耗时），由 /metrics 导出
+    from app import monitoring
+    monitoring.init_app(app)
+
+    # 初始化N+1查询检测（同一关系在一个请求中懒加载过多次时警告或抛出异常）
+    from app import nplusone
+    nplusone.init_app(app)
+
+    # 初始化慢查询日志（请求中超过阈值的SQL语句连同查询计划写入JSON Lines文件）
+    from app import slowlog
+    slowlog.init_app(app)
+
     # 确保在应用上下文环境中注册用户加载回调函数
     # 应用上下文提供了访问应用全局变量和配置的环境
     with app.app_context():
@@ -48,7 +91,33 @@ def create_app():
     # 这会根据模型定义生成数据库模式
     # 注意：这只会创建不存在的表，不会更新已有的表结构
     with app.app_context():
-        db.create_all()
+        # 只在主连接上建表：只读连接（读写分离时）打开的是同一数据库文件，且禁止写入
+        db.create_all(bind_key=None)
+
+        # 插入数据版本号所在的行（统计缓存据此判断数据是否被任何进程修改过）
+        from app import cache
+        cache.install_version()
+
+        # 为旧数据库补建成绩表（学号，课程ID）唯一索引，建索引前先清除重复成绩
+        from app import migrations
+        migrations.ensure_score_unique_index()
+
+        # create_all不会为已存在的表补建索引，这里逐一检查并补建模型中声明的索引
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=db.engine, checkfirst=True)
+
+        # 创建维护成绩分段计数和直方图分箱计数的触发器（首次创建时从成绩表回填计数）
+        from app import counters
+        counters.install_triggers()
+
+        # 创建学生全文索引（FTS5 trigram），由触发器与student表保持同步
+        from app import search
+        search.install_index()
+
+    # 注册命令行工具
+    from app.commands import register_commands
+    register_commands(app)
 
     # 返回配置好的Flask应用实例
     return app
\ No newline at end of file
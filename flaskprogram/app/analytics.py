@@ -0,0 +1,189 @@
+import numpy as np
+from app import db, sketch, stats_cache
+from app.models import Student, Course, Score, ScoreBucketCount
+from derived_tables import BUCKETS
+
+# 雷达图展示的专业列表
+MAJORS = [
+    "数据科学",
+    "计算机科学",
+    "软件工程",
+    "人工智能",
+    "网络安全"
+]
+
+# 学生成绩详情页的等级划分：不及格(<60)、及格(60-90)、优秀(>=90)
+GRADE_LEVELS = ['不及格', '及格', '优秀']
+GRADE_EDGES = [60, 90]
+
+
+def empty_distribution():
+    """返回各分数段计数均为0的分布字典"""
+    return {bucket: 0 for bucket in BUCKETS}
+
+
+def course_bucket_counts():
+    """读取由触发器维护的分段计数表，返回 {course_id: {分段: 人数}}"""
+    counts = {}
+    for course_id, bucket_name, count in db.session.execute(
+        db.select(ScoreBucketCount.course_id, ScoreBucketCount.bucket, ScoreBucketCount.count)
+    ):
+        counts.setdefault(course_id, empty_distribution())[bucket_name] = count
+    return counts
+
+
+def score_array(*criteria):
+    """通过Core查询直接读取成绩列为NumPy数组，不构造ORM对象"""
+    result = db.session.execute(
+        db.select(Score.score).where(Score.score.isnot(None), *criteria)
+    )
+    return np.fromiter(result.scalars(), dtype=float)
+
+
+def grade_distribution(scores):
+    """用np.digitize统计各等级（不及格、及格、优秀）的成绩数量"""
+    counts = np.bincount(np.digitize(scores, GRADE_EDGES), minlength=len(GRADE_LEVELS))
+    return dict(zip(GRADE_LEVELS, counts.tolist()))
+
+
+def student_summary(student_id):
+    """计算单个学生的成绩等级分布与平均分"""
+    scores = score_array(Score.student_id == student_id)
+    average_score = float(scores.mean()) if scores.size else 0
+    return grade_distribution(scores), average_score
+
+
+def score_distribution(bucket_counts):
+    """由各课程的分段计数汇总出整体成绩分布，无需再次扫描成绩表"""
+    if not bucket_counts:
+        return empty_distribution()
+    totals = np.array([[dist[bucket] for bucket in BUCKETS] for dist in bucket_counts.values()]).sum(axis=0)
+    return dict(zip(BUCKETS, totals.tolist()))
+
+
+def course_moments():
+    """由分段计数表汇总各课程的人数、平均分与方差，返回 {course_id: (人数, 平均分, 方差)}"""
+    rows = db.session.execute(
+        db.select(
+            ScoreBucketCount.course_id,
+            db.func.sum(ScoreBucketCount.count),
+            db.func.sum(ScoreBucketCount.sum),
+            db.func.sum(ScoreBucketCount.sum_sq)
+        ).group_by(ScoreBucketCount.course_id)
+    ).all()
+
+    moments = {}
+    for course_id, count, total, total_sq in rows:
+        if not count:
+            continue
+        mean = total / count
+        moments[course_id] = (count, mean, max(total_sq / count - mean * mean, 0.0))
+    return moments
+
+
+def course_averages():
+    """各课程平均分，返回 {course_id: 平均分}"""
+    return {course_id: mean for course_id, (count, mean, variance) in course_moments().items()}
+
+
+def major_averages(majors=MAJORS):
+    """关联学生表按专业分组计算平均分，无成绩的专业默认70分"""
+    rows = db.session.execute(
+        db.select(Student.major, db.func.avg(Score.score))
+        .join(Student, Score.student_id == Student.student_id)
+        .where(Student.major.in_(majors))
+        .group_by(Student.major)
+    ).all()
+    averages = {major: avg for major, avg in rows}
+    return [round(averages.get(major) or 70, 1) for major in majors]
+
+
+def hometown_counts():
+    """按生源地分组统计学生数量，返回 (生源地列表, 人数列表)"""
+    rows = db.session.execute(
+        db.select(Student.hometown, db.func.count(Student.student_id))
+        .group_by(Student.hometown)
+    ).all()
+    return [row[0] for row in rows], [row[1] for row in rows]
+
+
+def course_boxplots(course_ids):
+    """按课程返回箱线图数据，分位数由触发器维护的分箱计数表直接计算，无需扫描成绩表"""
+    boxplot_data = []
+    histograms = sketch.load_histograms()
+    for course_id in course_ids:
+        histogram = histograms.get(course_id)
+        if histogram is not None and histogram.total:
+            boxplot_data.append(histogram.boxplot())
+        else:
+            # 无成绩时使用默认值
+            boxplot_data.append([60, 68, 75, 82, 90])
+    return boxplot_data
+
+
+def course_list():
+    """按课程ID排序查询课程（只取需要的列）"""
+    return db.session.execute(
+        db.select(Course.course_id, Course.course_name).order_by(Course.course_id)
+    ).all()
+
+
+def distribution_chart():
+    """整体成绩分布柱状图数据（由各课程分段计数汇总）"""
+    distribution = score_distribution(course_bucket_counts())
+    return {'buckets': BUCKETS, 'counts': [distribution[bucket] for bucket in BUCKETS]}
+
+
+def course_distribution_chart():
+    """各课程成绩分布数据，同时返回课程列表用于生成课程选择下拉框"""
+    bucket_counts = course_bucket_counts()
+    courses = course_list()
+    return {
+        'buckets': BUCKETS,
+        'courses': [{'course_id': c.course_id, 'course_name': c.course_name} for c in courses],
+        'distributions': {
+            str(c.course_id): [bucket_counts.get(c.course_id, empty_distribution())[bucket] for bucket in BUCKETS]
+            for c in courses
+        }
+    }
+
+
+def major_averages_chart():
+    """专业平均分雷达图数据"""
+    return {'majors': MAJORS, 'scores': major_averages()}
+
+
+def course_averages_chart():
+    """课程平均分柱状图数据"""
+    courses = course_list()
+    averages = course_averages()
+    return {
+        'course_names': [c.course_name for c in courses],
+        'course_avgs': [round(averages.get(c.course_id) or 0, 1) for c in courses]
+    }
+
+
+def course_boxplot_chart():
+    """各课程成绩箱线图数据"""
+    courses = course_list()
+    return {
+        'course_names': [c.course_name for c in courses],
+        'boxplot_data': course_boxplots([c.course_id for c in courses])
+    }
+
+
+def hometowns_chart():
+    """生源地分布饼图数据"""
+    names, counts = hometown_counts()
+    return {'names': names, 'counts': counts}
+
+
+# 图表名称与数据计算函数的对应关系（供 /api/stats/<chart> 接口使用）
+CHARTS = {
+    'distribution': distribution_chart,
+    'course_distribution': course_distribution_chart,
+    'major_averages': major_averages_chart,
+    'course_averages': course_averages_chart,
+    'course_boxplot': course_boxplot_chart,
+    'hometowns': hometowns_chart
+}
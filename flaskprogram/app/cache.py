@@ -0,0 +1,190 @@
+import threading
+import uuid
+from flask import g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app import monitoring
+
+# 影响统计结果的模型名称（学生、课程、成绩及由触发器维护的成绩分段计数、分箱计数）
+WATCHED_MODELS = ('Student', 'Course', 'Score', 'ScoreBucketCount', 'ScoreBinCount')
+
+# 数据版本号所在行的ID
+VERSION_ID = 1
+
+
+class StatsCache:
+    """统计数据缓存：保存仪表盘等页面的计算结果
+
+    缓存项以数据库中的数据版本号标记；任何进程（其他工作进程、命令行工具、导入脚本）提交
+    学生/课程/成绩数据时递增版本号，各进程读取时发现版本号变化即重新计算
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # 缓存项：key -> (数据版本号, 数据)
+        self._token = None  # 数据库标识（data_version.token），首次生成ETag时读取
+
+    def init_app(self, app):
+        """注册SQLAlchemy会话事件，监听相关模型的写入"""
+        # 延迟导入，避免循环导入问题
+        from app import db
+
+        if not event.contains(db.session, 'after_commit', _after_commit):
+            event.listen(db.session, 'after_flush', _after_flush)
+            event.listen(db.session, 'do_orm_execute', _do_orm_execute)
+            event.listen(db.session, 'before_commit', _before_commit)
+            event.listen(db.session, 'after_commit', _after_commit)
+            event.listen(db.session, 'after_rollback', _after_rollback)
+        app.extensions['stats_cache'] = self
+
+    def current_version(self):
+        """当前的数据版本号；请求中只查询一次数据库（本请求提交写入后重新查询）"""
+        if not has_request_context():
+            return self._read_version()
+        version = g.get('stats_version')
+        if version is None:
+            version = g.stats_version = self._read_version()
+        return version
+
+    def _read_version(self):
+        """读取数据版本号；数据库标识尚未读取时在同一条语句中一并读取"""
+        if self._token is not None:
+            return read_version()
+        version, self._token = read_version_token()
+        return version
+
+    def get(self, key, compute):
+        """读取缓存项；不存在或数据版本号已变化时调用compute重新计算并缓存"""
+        version = self.current_version()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                monitoring.record_cache('stats', True)
+                return entry[1]
+
+        monitoring.record_cache('stats', False)
+        value = compute()
+
+        with self._lock:
+            # 计算期间数据若已变化，则以旧版本号保存，下次读取时会重新计算
+            self._entries[key] = (version, value)
+        return value
+
+    def etag(self, key, version):
+        """根据缓存项名称、数据库标识和数据版本号生成ETag（各工作进程、重启前后对同一数据生成相同的ETag）"""
+        if self._token is None:
+            self._token = read_version_token()[1]
+        return f'{key}-{self._token}-{version}'
+
+    def invalidate(self):
+        """递增数据库中的数据版本号，使所有进程的缓存失效
+
+        用于不经过会话中模型的写入，如直接执行的SQL语句、使用单独连接的批量写入
+        """
+        # 延迟导入，避免循环导入问题
+        from app import db
+
+        with db.engine.begin() as connection:
+            bump_version(connection)
+        if has_request_context():
+            g.pop('stats_version', None)
+        self.clear()
+
+    def clear(self):
+        """清空本进程的缓存项（如切换数据库时）"""
+        with self._lock:
+            self._entries.clear()
+            self._token = None
+
+
+def install_version():
+    """确保数据版本号所在的行存在并带有数据库标识（新建数据库或旧数据库首次启动时插入）"""
+    # 延迟导入，避免循环导入问题
+    from app import db
+    from app.models import DataVersion
+
+    columns = {row[1] for row in db.session.execute(db.text("PRAGMA table_info(data_version)"))}
+    if 'token' not in columns:
+        db.session.execute(db.text("ALTER TABLE data_version ADD COLUMN token TEXT"))
+    db.session.execute(
+        sqlite_insert(DataVersion).values(id=VERSION_ID, version=0, token=uuid.uuid4().hex[:8])
+        .on_conflict_do_nothing()
+    )
+    db.session.execute(
+        db.update(DataVersion).where(DataVersion.id == VERSION_ID, DataVersion.token.is_(None))
+        .values(token=uuid.uuid4().hex[:8])
+    )
+    db.session.commit()
+
+
+def read_version(connection=None):
+    """读取数据库中的数据版本号（connection默认为当前会话）；版本号所在的行不存在时返回0"""
+    # 延迟导入，避免循环导入问题
+    from app import db
+    from app.models import DataVersion
+
+    statement = db.select(DataVersion.version).where(DataVersion.id == VERSION_ID)
+    return (connection or db.session).execute(statement).scalar() or 0
+
+
+def read_version_token():
+    """读取数据版本号和数据库标识；所在的行不存在时返回 (0, '')"""
+    # 延迟导入，避免循环导入问题
+    from app import db
+    from app.models import DataVersion
+
+    row = db.session.execute(
+        db.select(DataVersion.version, DataVersion.token).where(DataVersion.id == VERSION_ID)
+    ).first()
+    return (row.version or 0, row.token or '') if row else (0, '')
+
+
+def bump_version(connection):
+    """在连接或会话的当前事务中递增数据版本号，返回递增后的版本号（所在的行不存在时返回None）"""
+    # 延迟导入，避免循环导入问题
+    from app import db
+    from app.models import DataVersion
+
+    return connection.execute(
+        db.update(DataVersion).where(DataVersion.id == VERSION_ID)
+        .values(version=DataVersion.version + 1).returning(DataVersion.version)
+    ).scalar()
+
+
+def _is_watched(mapper):
+    """判断映射是否属于需要监听的模型"""
+    return mapper is not None and mapper.class_.__name__ in WATCHED_MODELS
+
+
+def _after_flush(session, flush_context):
+    """刷新时检查新增、修改、删除的对象中是否包含相关模型"""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if type(obj).__name__ in WATCHED_MODELS:
+            session.info['stats_dirty'] = True
+            return
+
+
+def _do_orm_execute(orm_execute_state):
+    """捕获批量写入语句，例如 Score.query.filter_by(...).delete()"""
+    if orm_execute_state.is_select:
+        return
+    if any(_is_watched(mapper) for mapper in orm_execute_state.all_mappers):
+        orm_execute_state.session.info['stats_dirty'] = True
+
+
+def _before_commit(session):
+    """提交前若相关数据发生变化，在同一写事务中递增数据版本号（与数据写入一起提交或回滚）"""
+    session.flush()
+    if session.info.get('stats_dirty'):
+        bump_version(session)
+
+
+def _after_commit(session):
+    """事务提交后，若相关数据发生变化则在本请求中重新读取数据版本号"""
+    if session.info.pop('stats_dirty', False) and has_request_context():
+        g.pop('stats_version', None)
+
+
+def _after_rollback(session):
+    """事务回滚后丢弃未提交的变化标记"""
+    session.info.pop('stats_dirty', None)
@@ -0,0 +1,141 @@
+import os
+import time
+import click
+from app import counters, export, importer, migrations, sketch, slowlog, transcripts, utils
+
+
+@click.command('rebuild-score-counts')
+def rebuild_score_counts_command():
+    """一致性检查：从成绩表重建分段计数表和直方图分箱计数表，并列出重建前不一致的分段和分箱"""
+    mismatches, bin_mismatches = counters.rebuild()
+    for course_id, bucket, have, want in mismatches:
+        click.echo(f"课程 {course_id} 分段 {bucket}: 计数表 {have} 条，实际 {want} 条")
+    for course_id, bin_index, have, want in bin_mismatches:
+        click.echo(f"课程 {course_id} 分箱 {bin_index * sketch.RESOLUTION:.1f}: 计数表 {have} 条，实际 {want} 条")
+    if mismatches or bin_mismatches:
+        click.echo(f"已修正 {len(mismatches)} 个不一致的分段、{len(bin_mismatches)} 个不一致的分箱")
+    else:
+        click.echo("分段计数表、分箱计数表与成绩表一致")
+
+
+@click.command('dedupe-scores')
+def dedupe_scores_command():
+    """清除同一学生同一课程的重复成绩（保留最后写入的一条），并确保唯一索引存在"""
+    removed = migrations.dedupe_scores()
+    migrations.ensure_score_unique_index()
+    click.echo(f"已删除 {removed} 条重复成绩")
+
+
+@click.command('import-data')
+@click.argument('kind', type=click.Choice(sorted(importer.KINDS)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--chunk-size', type=int, default=importer.CHUNK_SIZE, show_default=True, help='每个事务写入的行数')
+@click.option('--resume', is_flag=True, help='跳过上次已提交的数据块，从失败处继续')
+def import_data_command(kind, path, chunk_size, resume):
+    """分块导入学生（students）、课程（courses）或成绩（scores）的CSV/XLSX文件"""
+    start = time.perf_counter()
+
+    def progress(state):
+        elapsed = time.perf_counter() - start
+        click.echo(f"第 {state.chunks_done} 块：已读取 {state.rows_read} 行，导入 {state.imported} 行，"
+                   f"跳过 {state.skipped} 行（{state.rows_read / max(elapsed, 1e-9):.0f} 行/秒）")
+
+    try:
+        state = importer.import_file(path, kind, chunk_size=chunk_size, resume=resume, progress=progress)
+    except importer.DataImportError as e:
+        raise click.ClickException(f"{e}\n修正后使用 --resume 重新运行可从失败的数据块继续")
+
+    for error in state.errors:
+        click.echo(f"第 {error['row']} 行：{error['error']}")
+    click.echo(f"导入完成：导入 {state.imported} 行，跳过 {state.skipped} 行，"
+               f"用时 {time.perf_counter() - start:.2f} 秒")
+
+
+@click.command('gen-data')
+@click.option('--students', 'student_count', type=int, default=100, show_default=True, help='学生数量')
+@click.option('--courses', 'course_count', type=int, default=8, show_default=True, help='课程数量')
+@click.option('--seed', type=int, default=0, show_default=True, help='随机种子，相同参数生成相同的数据')
+@click.option('--workers', type=int, default=None, help='生成数据的进程数，默认为CPU核数减一')
+@click.option('--prefix', default='G', show_default=True, help='生成的学号前缀')
+@click.option('--clear', is_flag=True, help='生成前清空现有的学生、课程和成绩')
+def gen_data_command(student_count, course_count, seed, workers, prefix, clear):
+    """生成用于压测的模拟数据（专业、生源地、选课和成绩分布不均匀，与真实数据相近）"""
+    if clear:
+        click.confirm('将清空现有的学生、课程和成绩数据，是否继续？', abort=True)
+    start = time.perf_counter()
+
+    def progress(students, scores):
+        elapsed = time.perf_counter() - start
+        click.echo(f"已写入 {students} 名学生、{scores} 条成绩（{scores / max(elapsed, 1e-9):.0f} 条成绩/秒）")
+
+    students, courses, scores = utils.generate_mock_data(
+        student_count, course_count, seed=seed, workers=workers or utils.default_workers(),
+        clear=clear, prefix=prefix, progress=progress
+    )
+    click.echo(f"模拟数据生成完成：新增学生{students}名，课程{courses}门，成绩{scores}条"
+               f"（已存在的记录跳过），用时 {time.perf_counter() - start:.1f} 秒")
+
+
+@click.command('export-scores')
+@click.argument('output', type=click.Path(dir_okay=False))
+@click.option('--student-id', help='只导出该学生的成绩')
+@click.option('--course-id', type=int, help='只导出该课程的成绩')
+def export_scores_command(output, student_id, course_id):
+    """导出成绩到CSV或XLSX文件（按扩展名判断格式），并输出导出速度（行/秒）"""
+    rows = export.stream_scores(student_id, course_id)
+    start = time.perf_counter()
+    if output.endswith('.xlsx'):
+        count = export.write_xlsx(rows, output)
+    else:
+        with open(output, 'w', encoding='utf-8', newline='') as f:
+            count = export.write_csv(rows, f)
+    elapsed = time.perf_counter() - start
+    click.echo(f"已导出 {count} 行到 {output}，用时 {elapsed:.2f} 秒（{count / max(elapsed, 1e-9):.0f} 行/秒）")
+
+
+@click.command('export-transcripts')
+@click.argument('output', type=click.Path(dir_okay=False))
+@click.option('--major', help='只导出该专业的学生')
+@click.option('--class', 'class_', help='只导出该班级的学生')
+@click.option('--workers', type=int, default=None, help='并行生成PDF的进程数，默认为CPU核数')
+def export_transcripts_command(output, major, class_, workers):
+    """批量生成PDF成绩单并打包为ZIP文件，输出生成速度（份/秒）"""
+    start = time.perf_counter()
+    data = transcripts.fetch_transcripts(major=major, class_=class_)
+    count = transcripts.write_zip(data, output, workers=workers or os.cpu_count() or 1)
+    elapsed = time.perf_counter() - start
+    click.echo(f"已生成 {count} 份成绩单到 {output}，用时 {elapsed:.2f} 秒（{count / max(elapsed, 1e-9):.1f} 份/秒）")
+
+
+@click.command('slow-queries')
+@click.option('--log', 'path', type=click.Path(dir_okay=False), default=None, help='慢查询日志路径，默认为配置中的SLOW_QUERY_LOG')
+@click.option('--top', type=int, default=20, show_default=True, help='显示累计耗时最多的语句数')
+def slow_queries_command(path, top):
+    """汇总慢查询日志：按累计耗时列出最慢的语句，并标出对学生表或成绩表的全表扫描"""
+    from flask import current_app
+    path = path or current_app.config['SLOW_QUERY_LOG']
+    summary = slowlog.summarize(slowlog.read_entries(path), limit=top)
+    if not summary:
+        click.echo(f"{path} 中没有慢查询记录")
+        return
+
+    for index, group in enumerate(summary, 1):
+        click.echo(f"{index}. 累计 {group['total_ms']:.1f} ms，{group['count']} 次，"
+                   f"平均 {group['avg_ms']:.1f} ms，最大 {group['max_ms']:.1f} ms，"
+                   f"端点 {', '.join(group['endpoints']) or '-'}")
+        click.echo(f"   {group['sql']}")
+        for step in group['plan']:
+            click.echo(f"   计划：{step}")
+        if group['scans']:
+            click.echo(f"   警告：全表扫描 {'; '.join(group['scans'])}，考虑添加索引")
+
+
+def register_commands(app):
+    """注册命令行工具（通过 flask <命令> 调用）"""
+    app.cli.add_command(rebuild_score_counts_command)
+    app.cli.add_command(dedupe_scores_command)
+    app.cli.add_command(import_data_command)
+    app.cli.add_command(gen_data_command)
+    app.cli.add_command(export_scores_command)
+    app.cli.add_command(export_transcripts_command)
+    app.cli.add_command(slow_queries_command)
@@ -0,0 +1,48 @@
+from app import db, stats_cache
+from app.models import ScoreBinCount, ScoreBucketCount
+from derived_tables import BIN_AGGREGATE_SQL, BUCKET_AGGREGATE_SQL, BUCKETS, REBUILD_SQL, TRIGGERS
+
+
+def install_triggers():
+    """创建触发器；若有触发器此前不存在，则从成绩表重建计数表（例如首次启动或旧数据库）"""
+    existing = set(db.session.execute(db.text(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+    )).scalars())
+
+    for name, ddl in TRIGGERS.items():
+        db.session.execute(db.text(ddl))
+    db.session.commit()
+
+    if not set(TRIGGERS) <= existing:
+        rebuild()
+
+
+def rebuild():
+    """清空分段计数表和分箱计数表并从成绩表重新计算，返回重建前不一致的 (分段列表, 分箱列表)"""
+    expected = {(row.course_id, row.bucket): row for row in db.session.execute(db.text(BUCKET_AGGREGATE_SQL))}
+    actual = {(row.course_id, row.bucket): row for row in ScoreBucketCount.query.all()}
+
+    mismatches = []
+    for key in sorted(set(expected) | set(actual), key=lambda k: (k[0], BUCKETS.index(k[1]))):
+        want, have = expected.get(key), actual.get(key)
+        want_count = want.count if want else 0
+        have_count = have.count if have else 0
+        want_sum = want.sum if want else 0
+        have_sum = have.sum if have else 0
+        if want_count != have_count or abs(want_sum - have_sum) > 1e-6 * max(1.0, abs(want_sum)):
+            mismatches.append((key[0], key[1], have_count, want_count))
+
+    expected_bins = {(row.course_id, row.bin): row.count for row in db.session.execute(db.text(BIN_AGGREGATE_SQL))}
+    actual_bins = {(row.course_id, row.bin): row.count for row in ScoreBinCount.query.all()}
+    bin_mismatches = [
+        (key[0], key[1], actual_bins.get(key, 0), expected_bins.get(key, 0))
+        for key in sorted(set(expected_bins) | set(actual_bins))
+        if actual_bins.get(key, 0) != expected_bins.get(key, 0)
+    ]
+
+    for sql in REBUILD_SQL:
+        db.session.execute(db.text(sql))
+    db.session.commit()
+    # 直接执行的SQL不经过会话中的模型，需递增数据版本号使统计缓存失效
+    stats_cache.invalidate()
+    return mismatches, bin_mismatches
@@ -0,0 +1,94 @@
+import csv
+import io
+import tempfile
+import xlsxwriter
+from app import db
+from app.models import Student, Course, Score
+
+# 导出文件的表头（与查询列一一对应）
+EXPORT_HEADERS = ['学号', '姓名', '课程ID', '课程名称', '成绩']
+
+# 每批从数据库读取的行数，同时也是CSV每次输出的行数
+CHUNK_SIZE = 1000
+
+
+def score_statement(student_id=None, course_id=None):
+    """构造成绩查询语句（关联学生、课程表，只取页面和导出需要的列），按学生ID、课程ID筛选"""
+    statement = db.select(
+        Score.id, Score.student_id, Student.name.label('student_name'),
+        Score.course_id, Course.course_name, Score.score
+    ).join(Student, Score.student_id == Student.student_id). \
+        join(Course, Score.course_id == Course.course_id)
+
+    if student_id:
+        statement = statement.where(Score.student_id == student_id)
+    if course_id:
+        statement = statement.where(Score.course_id == course_id)
+    return statement
+
+
+def stream_scores(student_id=None, course_id=None):
+    """按成绩ID顺序分批读取查询结果（服务端游标），不一次性加载全部记录"""
+    statement = score_statement(student_id, course_id).order_by(Score.id). \
+        execution_options(stream_results=True, yield_per=CHUNK_SIZE)
+    return db.session.execute(statement)
+
+
+def _export_row(row):
+    """将查询结果行转换为导出文件中的一行"""
+    return [row.student_id, row.student_name, row.course_id, row.course_name, row.score]
+
+
+def iter_csv(rows):
+    """逐块生成CSV内容，每块包含CHUNK_SIZE行；开头带BOM，便于Excel正确识别中文"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(EXPORT_HEADERS)
+
+    for count, row in enumerate(rows, 1):
+        writer.writerow(_export_row(row))
+        if count % CHUNK_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def write_csv(rows, output):
+    """将查询结果逐块写入已打开的文本文件，返回写入的行数（不含表头）"""
+    count = 0
+
+    def counted():
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    for chunk in iter_csv(counted()):
+        output.write(chunk)
+    return count
+
+
+def write_xlsx(rows, output):
+    """使用xlsxwriter的constant_memory模式逐行写入XLSX，已写完的行立即落盘，返回写入的行数
+
+    姓名、课程名称等文本一律按字符串写入，不会被当作公式或超链接（如以=开头的姓名）
+    """
+    workbook = xlsxwriter.Workbook(output, {
+        'constant_memory': True,
+        'strings_to_formulas': False,
+        'strings_to_urls': False,
+        'tmpdir': tempfile.gettempdir(),
+    })
+    worksheet = workbook.add_worksheet('成绩')
+    header_format = workbook.add_format({'bold': True})
+    worksheet.write_row(0, 0, EXPORT_HEADERS, header_format)
+
+    count = 0
+    for count, row in enumerate(rows, 1):
+        worksheet.write_row(count, 0, _export_row(row))
+
+    workbook.close()
+    return count
@@ -0,0 +1,289 @@
+import json
+import os
+import pandas as pd
+from openpyxl import load_workbook
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app import db
+from app.models import Student, Course, Score
+from app.score_entry import parse_score
+
+# 每个事务写入的行数：过小时提交次数多，过大时失败重做的代价高
+CHUNK_SIZE = 5000
+
+# 错误信息最多保留的条数，避免大文件中大量错误行占满内存
+MAX_ERRORS = 100
+
+# 各类数据的导入配置：表头别名 -> 字段名、必填字段、UPSERT冲突列及更新字段
+KINDS = {
+    'students': {
+        'model': Student,
+        'columns': {
+            'student_id': 'student_id', '学号': 'student_id',
+            'name': 'name', '姓名': 'name',
+            'gender': 'gender', '性别': 'gender',
+            'major': 'major', '专业': 'major',
+            'class': 'class_', '班级': 'class_',
+            'hometown': 'hometown', '生源地': 'hometown', '籍贯': 'hometown',
+            'password': 'password', '密码': 'password',
+        },
+        'required': ('student_id', 'name', 'major'),
+        'conflict': ('student_id',),
+        'update': ('name', 'gender', 'major', 'class_', 'hometown'),
+    },
+    'courses': {
+        'model': Course,
+        'columns': {
+            'course_id': 'course_id', '课程id': 'course_id', '课程ID': 'course_id',
+            'course_name': 'course_name', '课程名称': 'course_name',
+            'credit': 'credit', '学分': 'credit',
+        },
+        'required': ('course_id', 'course_name', 'credit'),
+        'conflict': ('course_id',),
+        'update': ('course_name', 'credit'),
+    },
+    'scores': {
+        'model': Score,
+        'columns': {
+            'student_id': 'student_id', '学号': 'student_id',
+            'course_id': 'course_id', '课程id': 'course_id', '课程ID': 'course_id',
+            'score': 'score', '成绩': 'score',
+        },
+        'required': ('student_id', 'course_id', 'score'),
+        'conflict': ('student_id', 'course_id'),
+        'update': ('score',),
+    },
+}
+
+
+class DataImportError(Exception):
+    """导入失败（文件格式错误或某个数据块写入失败），已提交的数据块可通过断点续传跳过"""
+
+
+def _normalize_header(header, kind):
+    """将文件表头映射为字段名，无法识别的列映射为None（忽略）"""
+    columns = KINDS[kind]['columns']
+    names = [columns.get(str(name).strip()) if name is not None else None for name in header]
+    missing = [name for name in KINDS[kind]['required'] if name not in names]
+    if missing:
+        raise DataImportError(f"缺少必需的列：{', '.join(missing)}")
+    return names
+
+
+def _cell(value):
+    """单元格值统一转换为去除首尾空白的字符串，空单元格为空字符串"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        # Excel中的整数（如学号、课程ID）读出为浮点数
+        value = int(value)
+    return str(value).strip()
+
+
+def _csv_chunks(path, chunk_size):
+    """用pandas按块读取CSV文件，所有列按字符串读取，逐块返回 (表头, 行列表)"""
+    reader = pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False,
+                         encoding='utf-8-sig', skipinitialspace=True)
+    for frame in reader:
+        yield list(frame.columns), frame.itertuples(index=False, name=None)
+
+
+def _xlsx_chunks(path, chunk_size):
+    """用openpyxl只读模式逐行读取第一个工作表，逐块返回 (表头, 行列表)"""
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield list(header), chunk
+                chunk = []
+        if chunk:
+            yield list(header), chunk
+    finally:
+        workbook.close()
+
+
+def read_chunks(path, chunk_size=CHUNK_SIZE):
+    """按扩展名选择读取方式，逐块返回 (表头, 行列表)，不一次性加载整个文件"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return _csv_chunks(path, chunk_size)
+    if extension in ('.xlsx', '.xlsm'):
+        return _xlsx_chunks(path, chunk_size)
+    raise DataImportError(f'不支持的文件格式：{extension}（仅支持CSV和XLSX）')
+
+
+class ImportState:
+    """导入进度：已提交的数据块、写入及跳过的行数、错误信息；保存在文件旁的进度文件中以支持断点续传"""
+
+    def __init__(self, path, kind, chunk_size):
+        self.path = path
+        self.kind = kind
+        self.chunk_size = chunk_size
+        self.progress_path = path + '.import-progress.json'
+        self.chunks_done = 0
+        self.rows_read = 0
+        self.imported = 0
+        self.skipped = 0
+        self.errors = []
+
+    def _signature(self):
+        """数据类型和分块大小不同时，旧进度中的数据块编号不再有效
+        （修正失败数据块后文件内容会变化，因此不比较文件本身）"""
+        return [self.kind, self.chunk_size]
+
+    def load(self):
+        """读取上次中断时保存的进度，进度文件不存在或与当前文件不符时从头开始"""
+        try:
+            with open(self.progress_path, encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if saved.get('signature') != self._signature():
+            return False
+        self.chunks_done = saved['chunks_done']
+        self.rows_read = saved['rows_read']
+        self.imported = saved['imported']
+        self.skipped = saved['skipped']
+        return True
+
+    def save(self):
+        """每提交一个数据块后保存进度"""
+        with open(self.progress_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'signature': self._signature(),
+                'chunks_done': self.chunks_done,
+                'rows_read': self.rows_read,
+                'imported': self.imported,
+                'skipped': self.skipped,
+            }, f)
+
+    def clear(self):
+        """导入完成后删除进度文件"""
+        if os.path.exists(self.progress_path):
+            os.remove(self.progress_path)
+
+    def error(self, row, message):
+        """记录一条错误行（超过MAX_ERRORS条后只计数）"""
+        self.skipped += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({'row': row, 'error': message})
+
+
+def _known_ids(column):
+    """读取已存在的ID集合，用于在内存中校验外键，不必逐行查询数据库"""
+    return set(db.session.execute(db.select(column)).scalars())
+
+
+def _validate(kind, record, known):
+    """校验并转换一行数据，返回可写入的字典；数据无效时抛出ValueError"""
+    for name in KINDS[kind]['required']:
+        if not record.get(name):
+            raise ValueError(f'{name} 不能为空')
+
+    if kind == 'students':
+        if not record.get('gender'):
+            record['gender'] = '男'
+        if not record.get('password'):
+            record['password'] = '123456'
+        return record
+
+    if not record['course_id'].isdigit():
+        raise ValueError('课程ID必须为整数')
+    record['course_id'] = int(record['course_id'])
+
+    if kind == 'courses':
+        if not record['credit'].isdigit():
+            raise ValueError('学分必须为整数')
+        record['credit'] = int(record['credit'])
+        return record
+
+    record['score'] = parse_score(record['score'])
+    if record['student_id'] not in known['students']:
+        raise ValueError(f"学生 {record['student_id']} 不存在")
+    if record['course_id'] not in known['courses']:
+        raise ValueError(f"课程 {record['course_id']} 不存在")
+    return record
+
+
+def _upsert_statement(kind):
+    """按导入配置构造UPSERT语句，已存在的记录更新为文件中的值"""
+    config = KINDS[kind]
+    model = config['model']
+    statement = sqlite_insert(model)
+    # 字段名为模型属性名（如class_），UPSERT中需使用对应的表列（如class）
+    columns = [getattr(model, name).expression for name in config['update']]
+    return statement.on_conflict_do_update(
+        index_elements=[getattr(model, name) for name in config['conflict']],
+        set_={column: statement.excluded[column.name] for column in columns}
+    )
+
+
+def import_file(path, kind, chunk_size=CHUNK_SIZE, resume=False, progress=None):
+    """分块导入学生、课程或成绩文件，每块在一个事务中以executemany写入，返回ImportState
+
+    - resume=True 时跳过上次已提交的数据块，从失败的数据块继续
+    - progress 为回调函数，每提交一个数据块后以ImportState调用一次
+    - 某个数据块写入失败时回滚该块、保存进度并抛出DataImportError
+    """
+    if kind not in KINDS:
+        raise DataImportError(f'未知的数据类型：{kind}')
+
+    state = ImportState(path, kind, chunk_size)
+    if resume:
+        state.load()
+
+    # 成绩的外键校验使用内存中的ID集合
+    known = {}
+    if kind == 'scores':
+        known['students'] = _known_ids(Student.student_id)
+        known['courses'] = _known_ids(Course.course_id)
+
+    statement = _upsert_statement(kind)
+    names = None
+    row_number = 1  # 表头为第1行
+    for index, (header, rows) in enumerate(read_chunks(path, chunk_size)):
+        if names is None:
+            names = _normalize_header(header, kind)
+        rows = list(rows)
+        if index < state.chunks_done:
+            # 断点续传：跳过已提交的数据块
+            row_number += len(rows)
+            continue
+
+        values = {}
+        for row in rows:
+            row_number += 1
+            record = {name: _cell(value) for name, value in zip(names, row) if name}
+            try:
+                record = _validate(kind, record, known)
+            except ValueError as e:
+                state.error(row_number, str(e))
+                continue
+            # 同一数据块中重复的记录以最后一行为准
+            values[tuple(record[name] for name in KINDS[kind]['conflict'])] = record
+
+        try:
+            if values:
+                db.session.execute(statement, list(values.values()))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            state.save()
+            raise DataImportError(f'第 {index + 1} 个数据块写入失败（已提交 {state.chunks_done} 块）：{getattr(e, "orig", e)}') from e
+
+        state.chunks_done = index + 1
+        state.rows_read += len(rows)
+        state.imported += len(values)
+        state.save()
+        if progress is not None:
+            progress(state)
+
+    if names is None:
+        raise DataImportError('文件为空')
+    state.clear()
+    return state
@@ -0,0 +1,221 @@
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+import numpy as np
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+# 每个端点保留最近多少次请求的统计
+WINDOW = 500
+
+# 最多记录多少种（归一化后的）SQL语句，超出时淘汰累计耗时最少的语句
+MAX_STATEMENTS = 1000
+
+# SQL归一化：字符串、数字常量替换为?，IN列表合并，空白压缩
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*\?\s*,?)+\)', re.IGNORECASE)
+_SPACES = re.compile(r'\s+')
+
+
+def normalize_sql(statement):
+    """将SQL语句归一化，使仅参数不同的语句归为一组"""
+    statement = _STRING.sub('?', statement)
+    statement = _NUMBER.sub('?', statement)
+    statement = _SPACES.sub(' ', statement).strip()
+    return _IN_LIST.sub('IN (...)', statement)
+
+
+class RequestStats:
+    """单个请求的统计：SQL语句数、数据库耗时（秒）、返回的行数、各关系的懒加载次数"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.lazy_loads = {}  # 关系（如Score.course） -> 懒加载次数，由 app.nplusone 统计
+
+
+def current_stats():
+    """返回当前请求的统计对象，不在请求中（如命令行工具）时返回None"""
+    if has_request_context():
+        return g.get('request_stats')
+    return None
+
+
+class _CountingCursor(sqlite3.Cursor):
+    """统计读取行数的游标，读取的行数计入当前请求"""
+
+    def _count(self, count):
+        stats = current_stats()
+        if stats is not None:
+            stats.rows += count
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            self._count(1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = super().fetchmany(*args, **kwargs)
+        self._count(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        self._count(len(rows))
+        return rows
+
+
+class _CountingConnection(sqlite3.Connection):
+    """默认使用_CountingCursor的SQLite连接"""
+
+    def cursor(self, factory=_CountingCursor):
+        return super().cursor(factory)
+
+
+def untracked_cursor(dbapi_connection):
+    """创建不经过连接游标工厂的游标，读取的行数不计入请求统计（用于PRAGMA、EXPLAIN等内部语句）"""
+    return sqlite3.Cursor(dbapi_connection)
+
+
+def listen_query_time(engine):
+    """在引擎上注册记录语句开始时间的监听器（只注册一次），请求统计和慢查询日志通过 query_elapsed 读取耗时"""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+
+
+def query_elapsed(context):
+    """语句的执行耗时（秒），在 after_cursor_execute 中调用；首次调用时计算并保存，各监听器读到同一个值"""
+    elapsed = getattr(context, '_query_elapsed', None)
+    if elapsed is None:
+        elapsed = context._query_elapsed = time.perf_counter() - context._query_start
+    return elapsed
+
+
+class RequestMetrics:
+    """请求性能统计：记录每个请求的SQL语句数、数据库耗时和返回行数，写入Server-Timing响应头，
+    并按端点保留最近的请求统计、按归一化SQL汇总语句耗时，供 /debug/metrics 页面查看"""
+
+    def __init__(self, window=WINDOW, max_statements=MAX_STATEMENTS):
+        self._lock = threading.Lock()
+        self.window = window
+        self.max_statements = max_statements
+        self._endpoints = {}  # 端点 -> 最近请求的 (总耗时, 数据库耗时, SQL语句数, 行数)
+        self._statements = {}  # 归一化SQL -> [执行次数, 总耗时, 最大耗时, 端点]
+
+    def configure(self, app):
+        """在初始化数据库扩展之前调用：SQLite连接使用可统计读取行数的游标"""
+        if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+            options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+            options.setdefault('connect_args', {}).setdefault('factory', _CountingConnection)
+
+    def init_app(self, app):
+        """注册请求钩子和数据库引擎事件"""
+        # 延迟导入，避免循环导入问题
+        from app import db
+
+        app.before_request(_before_request)
+        app.after_request(self._after_request)
+        # 主连接和只读连接（读写分离时）都需要统计
+        with app.app_context():
+            engines = list(db.engines.values())
+        for engine in engines:
+            listen_query_time(engine)
+            if not event.contains(engine, 'after_cursor_execute', self._after_cursor_execute):
+                event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        app.extensions['request_metrics'] = self
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        """语句执行后计入当前请求的统计，并按归一化SQL汇总耗时"""
+        stats = current_stats()
+        if stats is None:
+            return
+        elapsed = query_elapsed(context)
+        stats.queries += 1
+        stats.db_time += elapsed
+
+        key = normalize_sql(statement)
+        with self._lock:
+            entry = self._statements.get(key)
+            if entry is None:
+                if len(self._statements) >= self.max_statements:
+                    # 淘汰累计耗时最少的语句
+                    del self._statements[min(self._statements, key=lambda k: self._statements[k][1])]
+                entry = self._statements[key] = [0, 0.0, 0.0, request.endpoint]
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] = max(entry[2], elapsed)
+
+    def _after_request(self, response):
+        """写入Server-Timing响应头，并记录到所属端点的滚动统计（流式响应只包含生成响应前的部分）"""
+        stats = current_stats()
+        if stats is None:
+            return response
+        total = time.perf_counter() - stats.start
+        response.headers.add('Server-Timing', f'app;dur={total * 1000:.2f}')
+        response.headers.add('Server-Timing', f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries"')
+        response.headers.add('Server-Timing', f'db-rows;desc="{stats.rows} rows"')
+
+        endpoint = request.endpoint or '<404>'
+        with self._lock:
+            samples = self._endpoints.get(endpoint)
+            if samples is None:
+                samples = self._endpoints[endpoint] = deque(maxlen=self.window)
+            samples.append((total, stats.db_time, stats.queries, stats.rows))
+        return response
+
+    def endpoint_summary(self):
+        """各端点最近请求的汇总：请求数、耗时分位数（毫秒）、平均SQL语句数和行数，按p95耗时降序"""
+        with self._lock:
+            snapshot = {endpoint: np.array(samples) for endpoint, samples in self._endpoints.items()}
+
+        summary = []
+        for endpoint, samples in snapshot.items():
+            total, db_time, queries, rows = samples.T
+            summary.append({
+                'endpoint': endpoint,
+                'count': len(samples),
+                'p50_ms': float(np.percentile(total, 50)) * 1000,
+                'p95_ms': float(np.percentile(total, 95)) * 1000,
+                'max_ms': float(total.max()) * 1000,
+                'db_ms': float(db_time.mean()) * 1000,
+                'queries': float(queries.mean()),
+                'max_queries': int(queries.max()),
+                'rows': float(rows.mean()),
+            })
+        return sorted(summary, key=lambda item: item['p95_ms'], reverse=True)
+
+    def slowest_statements(self, limit=20):
+        """按累计耗时降序返回归一化后的SQL语句统计"""
+        with self._lock:
+            entries = [(key, list(entry)) for key, entry in self._statements.items()]
+        entries.sort(key=lambda item: item[1][1], reverse=True)
+        return [{
+            'sql': key,
+            'count': count,
+            'total_ms': total * 1000,
+            'avg_ms': total / count * 1000,
+            'max_ms': longest * 1000,
+            'endpoint': endpoint,
+        } for key, (count, total, longest, endpoint) in entries[:limit]]
+
+    def reset(self):
+        """清空所有统计"""
+        with self._lock:
+            self._endpoints.clear()
+            self._statements.clear()
+
+
+def _before_request():
+    """请求开始时创建统计对象"""
+    g.request_stats = RequestStats()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """记录语句开始执行的时间；保存在本次执行的上下文中，语句执行失败时随上下文一起丢弃"""
+    context._query_start = time.perf_counter()
@@ -0,0 +1,40 @@
+from app import db, stats_cache
+
+# 成绩表上（学号，课程ID）唯一索引的名称（新建数据库时由模型中的唯一约束创建）
+SCORE_UNIQUE_INDEX = 'uq_score_student_course'
+
+
+def _has_unique_index(table, columns):
+    """检查表上是否已有恰好覆盖指定列的唯一索引（包括UNIQUE约束自动创建的索引）"""
+    for index in db.session.execute(db.text(f"PRAGMA index_list('{table}')")).mappings():
+        if not index['unique']:
+            continue
+        indexed = [row['name'] for row in db.session.execute(db.text(f"PRAGMA index_info('{index['name']}')")).mappings()]
+        if indexed == list(columns):
+            return True
+    return False
+
+
+def dedupe_scores():
+    """删除同一学生同一课程的重复成绩，只保留最后写入（ID最大）的一条，返回删除的行数"""
+    result = db.session.execute(db.text(
+        "DELETE FROM score WHERE id NOT IN (SELECT MAX(id) FROM score GROUP BY student_id, course_id)"
+    ))
+    db.session.commit()
+    if result.rowcount:
+        # 分段计数由删除触发器同步扣除；直接执行的SQL不经过会话中的模型，需递增数据版本号使统计缓存失效
+        stats_cache.invalidate()
+    return result.rowcount
+
+
+def ensure_score_unique_index():
+    """为旧数据库补建成绩表（学号，课程ID）唯一索引；建索引前先清除重复成绩，返回删除的行数"""
+    if _has_unique_index('score', ('student_id', 'course_id')):
+        return 0
+
+    removed = dedupe_scores()
+    db.session.execute(db.text(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {SCORE_UNIQUE_INDEX} ON score (student_id, course_id)"
+    ))
+    db.session.commit()
+    return removed
@@ -27,6 +27,9 @@ class Student(db.Model):
     hometown = db.Column(db.Text)  # 籍贯
     password = db.Column(db.Text, nullable=False, default="123456")  # 默认密码
 
+    # 姓名+学号覆盖索引，用于按姓名前缀的自动补全
+    __table_args__ = (db.Index('ix_student_name_student_id', 'name', 'student_id'),)
+
     def __repr__(self):
         """返回学生对象的标识信息"""
         return f'<Student {self.student_id}>'
@@ -35,8 +38,8 @@ class Course(db.Model):
     """课程信息模型"""
     __tablename__ = "course"
     course_id = db.Column(db.Integer, primary_key=True)  # 课程ID
-    course_name = db.Column(db.Text, nullable=False)  # 课程名称
-    credit = db.Column(db.Integer, nullable=False)  # 学分
+    course_name = db.Column(db.Text, nullable=False, index=True)  # 课程名称（索引支持按名称前缀搜索）
+    credit = db.Column(db.Integer, nullable=False, index=True)  # 学分（索引支持按学分精确或范围搜索）
 
 
     def __repr__(self):
@@ -48,13 +51,51 @@ class Score(db.Model):
     __tablename__ = "score"
     id = db.Column(db.Integer, primary_key=True)  # 自增主键
     student_id = db.Column(db.Text, db.ForeignKey("student.student_id"), nullable=False)  # 关联学生
-    course_id = db.Column(db.Integer, db.ForeignKey("course.course_id"), nullable=False)  # 关联课程
+    course_id = db.Column(db.Integer, db.ForeignKey("course.course_id"), nullable=False, index=True)  # 关联课程（索引支持按课程查询和删除）
     score = db.Column(db.Float)  # 成绩分数
 
+    # 同一学生同一课程只有一条成绩；唯一索引同时支持按学号查询（最左前缀）和成绩录入时的UPSERT
+    __table_args__ = (db.UniqueConstraint('student_id', 'course_id', name='uq_score_student_course'),)
+
     # 定义关系映射
     student = db.relationship('Student', backref=db.backref('scores', lazy=True))  # 学生->成绩
     course = db.relationship('Course', backref=db.backref('scores', lazy=True))  # 课程->成绩
 
     def __repr__(self):
         """返回成绩记录的标识信息"""
-        return f'<Score {self.student_id} {self.course_id}>'
\ No newline at end of file
+        return f'<Score {self.student_id} {self.course_id}>'
+
+class ScoreBucketCount(db.Model):
+    """成绩分段计数模型，按课程和分数段汇总人数、总分与平方和，由score表上的触发器维护"""
+    __tablename__ = "score_bucket_counts"
+    course_id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # 课程ID
+    bucket = db.Column(db.Text, primary_key=True)  # 分数段，如"60-70"
+    count = db.Column(db.Integer, nullable=False, default=0)  # 人数
+    sum = db.Column(db.Float, nullable=False, default=0)  # 成绩总和
+    sum_sq = db.Column(db.Float, nullable=False, default=0)  # 成绩平方和
+
+    def __repr__(self):
+        """返回分段计数的标识信息"""
+        return f'<ScoreBucketCount {self.course_id} {self.bucket}>'
+
+class ScoreBinCount(db.Model):
+    """成绩直方图分箱计数模型，按课程和0.1分宽的分箱汇总人数，由score表上的触发器维护，用于计算分位数"""
+    __tablename__ = "score_bin_counts"
+    course_id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # 课程ID
+    bin = db.Column(db.Integer, primary_key=True, autoincrement=False)  # 箱编号，floor(成绩 * 10 + 0.5)
+    count = db.Column(db.Integer, nullable=False, default=0)  # 人数
+
+    def __repr__(self):
+        """返回分箱计数的标识信息"""
+        return f'<ScoreBinCount {self.course_id} {self.bin}>'
+
+class DataVersion(db.Model):
+    """数据版本号模型（只有一行），学生、课程、成绩数据每次提交时在同一事务中递增，各进程据此判断统计缓存是否过期"""
+    __tablename__ = "data_version"
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # 固定为1
+    version = db.Column(db.Integer, nullable=False, default=0)  # 数据版本号
+    token = db.Column(db.Text)  # 数据库标识，创建时随机生成，与版本号一起组成ETag（重建数据库后版本号重新计数也不会混淆）
+
+    def __repr__(self):
+        """返回数据版本号的标识信息"""
+        return f'<DataVersion {self.version}>'
@@ -0,0 +1,77 @@
+import os
+import time
+from flask import request
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest
+from prometheus_client import multiprocess
+
+# 多进程部署（如gunicorn多个工作进程）时，在启动前将环境变量 PROMETHEUS_MULTIPROC_DIR 设为一个空目录，
+# 各进程的指标值写入该目录下的内存映射文件，/metrics 汇总所有进程的数据；
+# 工作进程退出时应调用 prometheus_client.multiprocess.mark_process_dead(pid)（如在gunicorn的child_exit钩子中）
+
+# 只统计 main 蓝图中的路由，避免静态文件和404请求产生大量标签
+ENDPOINT_PREFIX = 'main.'
+
+# 请求耗时与数据库耗时的分桶（秒）
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# 每个请求SQL语句数的分桶
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+REQUEST_LATENCY = Histogram(
+    'flaskprogram_request_duration_seconds', '请求处理耗时（流式响应只包含生成响应前的部分）',
+    ['endpoint', 'method', 'status'], buckets=LATENCY_BUCKETS)
+REQUEST_QUERIES = Histogram(
+    'flaskprogram_request_db_queries', '每个请求执行的SQL语句数',
+    ['endpoint'], buckets=QUERY_BUCKETS)
+REQUEST_DB_TIME = Histogram(
+    'flaskprogram_request_db_duration_seconds', '每个请求的数据库耗时',
+    ['endpoint'], buckets=LATENCY_BUCKETS)
+LOGINS = Counter(
+    'flaskprogram_logins', '登录尝试次数', ['result'])
+CACHE_LOOKUPS = Counter(
+    'flaskprogram_cache_lookups', '缓存查找次数（stats为服务端统计缓存，etag为浏览器条件请求）',
+    ['cache', 'result'])
+
+
+def init_app(app):
+    """注册请求结束时记录指标的钩子（每个请求的统计由 request_metrics 收集）"""
+    app.after_request(_after_request)
+
+
+def _after_request(response):
+    """请求结束时记录耗时、SQL语句数和数据库耗时"""
+    # 延迟导入，避免循环导入问题
+    from app.metrics import current_stats
+
+    endpoint = request.endpoint
+    stats = current_stats()
+    if stats is not None and endpoint and endpoint.startswith(ENDPOINT_PREFIX):
+        observe_request(endpoint, request.method, response.status_code, stats)
+    return response
+
+
+def observe_request(endpoint, method, status, stats):
+    """记录一个请求的指标，stats为 app.metrics.RequestStats"""
+    REQUEST_LATENCY.labels(endpoint, method, status).observe(time.perf_counter() - stats.start)
+    REQUEST_QUERIES.labels(endpoint).observe(stats.queries)
+    REQUEST_DB_TIME.labels(endpoint).observe(stats.db_time)
+
+
+def record_login(success):
+    """记录一次登录尝试"""
+    LOGINS.labels('success' if success else 'failure').inc()
+
+
+def record_cache(cache, hit):
+    """记录一次缓存查找"""
+    CACHE_LOOKUPS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def render():
+    """生成Prometheus文本格式的指标数据，返回 (内容, Content-Type)；多进程模式下汇总所有进程的数据"""
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,80 @@
+from contextlib import contextmanager
+from flask import current_app, request
+from sqlalchemy import event
+from app.metrics import current_stats
+
+# 同一关系在一个请求中懒加载超过该次数时视为N+1查询
+THRESHOLD = 5
+
+# 发现N+1查询时的处理方式：warn 记录警告日志，raise 抛出NPlusOneError，ignore 不处理
+ACTIONS = ('warn', 'raise', 'ignore')
+
+
+class NPlusOneError(Exception):
+    """同一关系在一个请求中的懒加载次数超过阈值（NPLUSONE_ACTION为raise时抛出）"""
+
+
+def init_app(app):
+    """读取配置并注册会话事件，统计每个请求中各关系的懒加载次数"""
+    # 延迟导入，避免循环导入问题
+    from app import db
+
+    app.config.setdefault('NPLUSONE_THRESHOLD', THRESHOLD)
+    app.config.setdefault('NPLUSONE_ACTION', 'warn')
+    if app.config['NPLUSONE_ACTION'] not in ACTIONS:
+        raise ValueError(f"NPLUSONE_ACTION 必须为 {', '.join(ACTIONS)} 之一")
+    if not event.contains(db.session, 'do_orm_execute', _do_orm_execute):
+        event.listen(db.session, 'do_orm_execute', _do_orm_execute)
+
+
+def _do_orm_execute(orm_execute_state):
+    """关系懒加载时计数，同一关系超过阈值时按配置警告或抛出异常（每个请求每个关系只处理一次）"""
+    if not orm_execute_state.is_relationship_load or orm_execute_state.lazy_loaded_from is None:
+        return
+    stats = current_stats()
+    if stats is None:
+        return
+
+    relationship = str(orm_execute_state.loader_strategy_path.prop)
+    count = stats.lazy_loads[relationship] = stats.lazy_loads.get(relationship, 0) + 1
+    threshold = current_app.config['NPLUSONE_THRESHOLD']
+    action = current_app.config['NPLUSONE_ACTION']
+    if count != threshold + 1 or action == 'ignore':
+        return
+
+    message = (f'{request.endpoint or request.path}：关系 {relationship} 在一个请求中懒加载超过 {threshold} 次，'
+               f'可能存在N+1查询，请使用joinedload或selectinload预加载')
+    if action == 'raise':
+        raise NPlusOneError(message)
+    current_app.logger.warning(message)
+
+
+@contextmanager
+def assert_max_queries(limit, engines=None):
+    """测试辅助：代码块中执行的SQL语句超过limit条时抛出AssertionError，错误信息中列出所有语句
+
+    engines默认为应用的所有数据库引擎（含读写分离的只读连接，需在应用上下文中调用），例如：
+        with app.app_context(), assert_max_queries(3):
+            client.get('/student_scores/20230001')
+    """
+    if engines is None:
+        # 延迟导入，避免循环导入问题
+        from app import db
+        engines = list(db.engines.values())
+
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', _record)
+    try:
+        yield statements
+    finally:
+        for engine in engines:
+            event.remove(engine, 'before_cursor_execute', _record)
+
+    if len(statements) > limit:
+        listing = '\n'.join(f'  {index}. {statement}' for index, statement in enumerate(statements, 1))
+        raise AssertionError(f'执行了 {len(statements)} 条SQL语句，超过上限 {limit} 条：\n{listing}')
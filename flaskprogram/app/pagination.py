@@ -0,0 +1,110 @@
+import base64
+import json
+from sqlalchemy import Select
+from app import db
+
+# 按偏移量分页时最多翻到的位置：按相关度排序需要对全部匹配结果排序，偏移量越大代价越高
+MAX_OFFSET = 1000
+
+
+def encode_cursor(value):
+    """将游标值编码为不透明的URL安全字符串"""
+    return base64.urlsafe_b64encode(json.dumps(value).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """解码游标字符串，格式错误时返回None（视为从第一页开始）"""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        value = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+    except (ValueError, UnicodeError):
+        return None
+    # 游标只允许是单个标量值
+    return value if isinstance(value, (str, int, float)) and not isinstance(value, bool) else None
+
+
+def _fetch(query):
+    """执行ORM查询对象或Core查询语句，返回结果列表"""
+    if isinstance(query, Select):
+        return db.session.execute(query).all()
+    return query.all()
+
+
+class KeysetPagination:
+    """键集（游标）分页：按唯一键排序，用 WHERE key > 游标 LIMIT n 取页，翻到多深代价都相同
+
+    query 可以是ORM查询对象（如 Student.query），也可以是Core查询语句（db.select(...)）
+    """
+
+    def __init__(self, query, key, attr, per_page=10, after=None, before=None, total=None):
+        self.per_page = per_page
+        self.total = total  # 总数可选（例如由统计缓存提供），搜索时为None
+
+        after_value = decode_cursor(after)
+        before_value = decode_cursor(before)
+        query = query.order_by(None)
+
+        rows = []
+        if before_value is not None:
+            # 向前翻页：倒序取上一页，再恢复正序
+            rows = _fetch(query.filter(key < before_value).order_by(key.desc()).limit(per_page + 1))
+            self.has_prev = len(rows) > per_page
+            self.has_next = True
+            self.items = list(reversed(rows[:per_page]))
+
+        if not rows:
+            # 向后翻页；没有游标或向前已无记录时从第一页开始
+            if before_value is not None:
+                after_value = None
+            if after_value is not None:
+                query = query.filter(key > after_value)
+            rows = _fetch(query.order_by(key).limit(per_page + 1))
+            self.has_prev = after_value is not None
+            self.has_next = len(rows) > per_page
+            self.items = rows[:per_page]
+
+        # 当前页首尾记录的键值作为上一页、下一页的游标
+        self.prev_cursor = encode_cursor(getattr(self.items[0], attr)) if self.items and self.has_prev else None
+        self.next_cursor = encode_cursor(getattr(self.items[-1], attr)) if self.items and self.has_next else None
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+class OffsetPagination:
+    """偏移量分页：用于按相关度等非唯一键排序、无法使用键集分页的查询，最多翻到 max_offset 条
+
+    接口与KeysetPagination相同，游标为编码后的偏移量：after为下一页的起点，before为上一页的终点
+    """
+
+    def __init__(self, query, per_page=10, after=None, before=None, max_offset=MAX_OFFSET):
+        self.per_page = per_page
+        self.total = None
+
+        # 游标必须是不超过上限的非负整数，否则从第一页开始
+        after_value = _offset(decode_cursor(after), max_offset)
+        before_value = _offset(decode_cursor(before), max_offset)
+        if before_value is not None:
+            start = max(before_value - per_page, 0)
+        else:
+            start = min(after_value or 0, max(max_offset - per_page, 0))
+
+        rows = _fetch(query.limit(per_page + 1).offset(start))
+        self.items = rows[:per_page]
+        self.has_prev = start > 0
+        self.has_next = len(rows) > per_page and start + per_page < max_offset
+
+        self.prev_cursor = encode_cursor(start) if self.has_prev else None
+        self.next_cursor = encode_cursor(start + per_page) if self.has_next else None
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+def _offset(value, max_offset):
+    """校验游标中的偏移量，不是 [0, max_offset] 内的整数时返回None"""
+    if isinstance(value, int) and 0 <= value <= max_offset:
+        return value
+    return None
@@ -0,0 +1,75 @@
+import re
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from app.metrics import untracked_cursor
+
+# 未在配置文件中设置 SQLITE_PRAGMAS 时使用的生产环境配置
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',  # 预写日志：写事务不阻塞读取，读取也不阻塞写入
+    'synchronous': 'NORMAL',  # WAL模式下只在检查点时等待落盘，断电可能丢失最近的事务但不会损坏数据库
+    'busy_timeout': 5000,  # 数据库被锁定时最多等待5秒，而不是立即报错
+    'cache_size': -65536,  # 每个连接的页缓存64MB（负数单位为KB）
+    'mmap_size': 268435456,  # 内存映射读取256MB，减少系统调用和数据复制
+    'temp_store': 'MEMORY',  # 排序、分组使用的临时数据放在内存中
+}
+
+# PRAGMA名称及取值只允许标识符或整数，防止配置中混入其他SQL
+_NAME = re.compile(r'^[a-z_]+$')
+_VALUE = re.compile(r'^(-?\d+|[A-Za-z_]+)$')
+
+
+def is_memory_database(uri):
+    """判断数据库URI是否为SQLite内存数据库（sqlite://、:memory:、mode=memory）"""
+    url = make_url(uri)
+    if not url.drivername.startswith('sqlite'):
+        return False
+    database = url.database or ''
+    return database in ('', ':memory:') or database.startswith('file::memory:') or url.query.get('mode') == 'memory'
+
+
+def configure(app):
+    """在初始化数据库扩展之前调用：数据库文件或数据库服务器使用 SQLALCHEMY_POOL_OPTIONS 设置连接池大小
+
+    内存数据库由SQLAlchemy使用StaticPool（所有请求共用一个连接），传入连接池大小会在创建引擎时报错
+    """
+    pool_options = app.config.get('SQLALCHEMY_POOL_OPTIONS') or {}
+    if not pool_options or is_memory_database(app.config['SQLALCHEMY_DATABASE_URI']):
+        return
+    options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    for name, value in pool_options.items():
+        options.setdefault(name, value)
+
+
+def init_app(app):
+    """为SQLite数据库引擎注册连接事件，每个新建的连接执行配置中的PRAGMA；SQLITE_PRAGMAS为空时使用SQLite默认设置"""
+    # 延迟导入，避免循环导入问题
+    from app import db
+
+    app.config.setdefault('SQLITE_PRAGMAS', DEFAULT_PRAGMAS)
+    pragmas = dict(app.config['SQLITE_PRAGMAS'] or {})
+    for name, value in pragmas.items():
+        if not _NAME.match(name) or not _VALUE.match(str(value)):
+            raise ValueError(f'无效的PRAGMA设置：{name} = {value}')
+    if not pragmas or not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        return
+
+    def set_pragmas(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas)
+
+    with app.app_context():
+        event.listen(db.engine, 'connect', set_pragmas)
+
+
+def apply_pragmas(dbapi_connection, pragmas):
+    """在SQLite连接上依次执行PRAGMA"""
+    cursor = untracked_cursor(dbapi_connection)
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}').fetchall()
+    finally:
+        cursor.close()
+
+
+def current_pragmas(connection, names):
+    """读取连接当前的PRAGMA取值（用于检查配置是否生效）"""
+    return {name: connection.exec_driver_sql(f'PRAGMA {name}').scalar() for name in names}
@@ -1,8 +1,13 @@
+import io
+import os
+import tempfile
 from flask import *
 from flask_login import current_user, login_user, logout_user, login_required
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from werkzeug.security import generate_password_hash, check_password_hash
-from app import db
+from app import db, analytics, export, importer, monitoring, request_metrics, score_entry, search as search_index, stats_cache, transcripts as transcript_builder
 from app.models import Student, Course, Score, User
+from app.pagination import KeysetPagination, OffsetPagination
 
 bp = Blueprint('main', __name__)
 
@@ -70,9 +75,11 @@ def login():
         # 验证用户存在且密码正确
         if user and check_password_hash(user.password, password):
             login_user(user)  # 登录用户（Flask-Login功能）
+            monitoring.record_login(True)
             flash('登录成功！', 'success')
             return redirect(url_for('main.home'))  # 登录后跳转到首页
         # 验证失败，显示错误信息
+        monitoring.record_login(False)
         flash('用户名或密码错误', 'danger')
     # GET请求：显示登录表单
     return render_template('login.html')
@@ -87,14 +94,21 @@ def logout():
     return redirect(url_for('main.login'))  # 登出后跳转到登录页
 
 
+# 学生、课程、成绩记录数量（缓存至相关数据变化，首页与列表页共用）
+def home_counts():
+    return stats_cache.get('home_counts', lambda: (
+        Student.query.count(),
+        Course.query.count(),
+        Score.query.count()
+    ))
+
+
 # 系统首页功能：显示系统概览数据和统计信息
 @bp.route('/')
 @login_required
 def home():
-    # 统计系统数据（学生、课程、成绩记录数量）
-    student_count = Student.query.count()
-    course_count = Course.query.count()
-    score_count = Score.query.count()
+    # 统计系统数据（学生、课程、成绩记录数量），结果缓存至相关数据变化
+    student_count, course_count, score_count = home_counts()
 
     # 获取最新添加的5名学生（按学号倒序排序）
     recent_students = Student.query.order_by(Student.student_id.desc()).limit(5).all()
@@ -111,21 +125,22 @@ def home():
 @bp.route('/students')
 @login_required
 def student_list():
-    # 获取搜索关键词和页码参数
+    # 获取搜索关键词和分页游标参数
     search = request.args.get('search', '')
-    page = request.args.get('page', 1, type=int)
+    after = request.args.get('after')
+    before = request.args.get('before')
     per_page = 10  # 每页显示10条记录
 
-    # 根据搜索关键词过滤学生（支持按姓名、学号、专业搜索）
+    # 根据搜索关键词过滤学生（支持按学号、姓名、专业、班级、生源地搜索，使用全文索引检索）
+    # 搜索结果按相关度排序，只能按偏移量分页（最多翻到 MAX_OFFSET 条）；不在每次翻页时执行COUNT(*)
     if search:
-        students = Student.query.filter(
-            (Student.name.contains(search)) |
-            (Student.student_id.contains(search)) |
-            (Student.major.contains(search))
-        ).paginate(page=page, per_page=per_page)
+        students = OffsetPagination(search_index.search_students(search),
+                                    per_page=per_page, after=after, before=before)
     else:
-        # 无搜索时查询所有学生并分页
-        students = Student.query.paginate(page=page, per_page=per_page)
+        # 无搜索时查询所有学生并分页，总数取自统计缓存
+        students = KeysetPagination(Student.query, Student.student_id, 'student_id',
+                                    per_page=per_page, after=after, before=before,
+                                    total=home_counts()[0])
 
     # 渲染学生列表模板
     return render_template('student/list.html',
@@ -218,26 +233,11 @@ def student_delete(student_id):
 def student_scores(student_id):
     # 查询学生，不存在则返回404
     student = Student.query.get_or_404(student_id)
-    # 获取该学生的所有成绩
-    scores = Score.query.filter_by(student_id=student_id).all()
-
-    # 统计成绩分布区间（不及格、及格、优秀）
-    score_distribution = {
-        "不及格": 0,
-        "及格": 0,
-        "优秀": 0
-    }
-    for score in scores:
-        if score.score < 60:
-            score_distribution["不及格"] += 1
-        elif 60 <= score.score < 90:
-            score_distribution["及格"] += 1
-        elif score.score >= 90:
-            score_distribution["优秀"] += 1
-
-    # 计算平均分
-    total = sum(score.score for score in scores)
-    average_score = total / len(scores) if scores else 0
+    # 获取该学生的所有成绩，同时预加载课程信息（模板中逐行读取课程名称和学分，避免N+1查询）
+    scores = Score.query.options(db.joinedload(Score.course)).filter_by(student_id=student_id).all()
+
+    # 统计成绩分布区间（不及格、及格、优秀）并计算平均分（NumPy向量化计算）
+    score_distribution, average_score = analytics.student_summary(student_id)
 
     # 渲染成绩详情模板
     return render_template('student/scores.html',
@@ -247,25 +247,63 @@ def student_scores(student_id):
                            score_distribution=score_distribution)
 
 
+# 学生PDF成绩单下载
+@bp.route('/student/<student_id>/transcript.pdf')
+@login_required
+def student_transcript(student_id):
+    transcripts = transcript_builder.fetch_transcripts(student_ids=[student_id])
+    if not transcripts:
+        abort(404)
+    return send_file(io.BytesIO(transcript_builder.render_transcript(transcripts[0])),
+                     mimetype='application/pdf', as_attachment=True,
+                     download_name=transcript_builder.transcript_filename(transcripts[0]))
+
+
+# 批量下载PDF成绩单（按专业、班级筛选），在请求中逐份生成后打包为ZIP
+@bp.route('/transcripts.zip')
+@login_required
+def transcripts_zip():
+    major = request.args.get('major')
+    class_ = request.args.get('class')
+    # 未指定专业或班级时不允许一次导出全部学生
+    if not major and not class_:
+        abort(400)
+    # 网页下载在请求中逐份生成PDF，人数过多时改用命令行工具（多进程并行生成）
+    if transcript_builder.count_transcripts(major=major, class_=class_) > transcript_builder.MAX_DOWNLOAD:
+        abort(400, description=f'一次最多下载 {transcript_builder.MAX_DOWNLOAD} 份成绩单，'
+                               f'请缩小筛选范围或使用 flask export-transcripts 命令导出')
+
+    transcripts = transcript_builder.fetch_transcripts(major=major, class_=class_)
+    if not transcripts:
+        abort(404)
+    output = tempfile.TemporaryFile()
+    transcript_builder.write_zip(transcripts, output)
+    output.seek(0)
+    return send_file(output, mimetype='application/zip', as_attachment=True,
+                     download_name='transcripts.zip')
+
+
 # 课程列表功能：展示所有课程信息，支持搜索和分页
 @bp.route('/courses')
 @login_required
 def course_list():
-    # 获取搜索关键词和页码参数
+    # 获取搜索关键词和分页游标参数
     search = request.args.get('search', '')
-    page = request.args.get('page', 1, type=int)
+    after = request.args.get('after')
+    before = request.args.get('before')
     per_page = 10  # 每页显示10条记录
 
-    # 根据搜索关键词过滤课程（支持按课程ID、名称、学分搜索）
+    # 根据搜索关键词过滤课程，按课程ID进行键集分页
+    # 数字按课程ID或学分精确查找，credit>=3 等按范围查找，文本按课程名称前缀查找
     if search:
-        courses = Course.query.filter(
-            (Course.course_id.contains(search)) |
-            (Course.course_name.contains(search)) |
-            (Course.credit.contains(search))
-        ).paginate(page=page, per_page=per_page)
+        courses = KeysetPagination(search_index.search_courses(search),
+                                   Course.course_id, 'course_id',
+                                   per_page=per_page, after=after, before=before)
     else:
-        # 无搜索时查询所有课程并分页
-        courses = Course.query.paginate(page=page, per_page=per_page)
+        # 无搜索时查询所有课程并分页，总数取自统计缓存
+        courses = KeysetPagination(Course.query, Course.course_id, 'course_id',
+                                   per_page=per_page, after=after, before=before,
+                                   total=home_counts()[1])
 
     # 渲染课程列表模板
     return render_template('course/list.html',
@@ -346,34 +384,33 @@ def score_input():
         course_id = request.form['course_id']
         score_value = request.form['score']
 
-        # 验证学生是否存在
-        if not Student.query.get(student_id):
-            flash('学生不存在', 'danger')
+        try:
+            score_value = score_entry.parse_score(score_value)
+        except ValueError as e:
+            flash(str(e), 'danger')
             return redirect(url_for('main.score_input'))
 
-        # 验证课程是否存在
-        if not Course.query.get(course_id):
-            flash('课程不存在', 'danger')
+        # 单条语句完成录入：学生和课程都存在时插入成绩，已有成绩则更新（依赖学号+课程ID唯一索引）
+        statement = sqlite_insert(Score).from_select(
+            ['student_id', 'course_id', 'score'],
+            db.select(Student.student_id, Course.course_id, db.literal(score_value, db.Float))
+            .join(Course, Course.course_id == course_id)
+            .where(Student.student_id == student_id)
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[Score.student_id, Score.course_id],
+            set_={'score': statement.excluded.score}
+        ).returning(Score.id)
+
+        if db.session.execute(statement).first() is None:
+            # 没有写入任何行，说明学生或课程不存在（仅在出错时才查询具体原因）
+            db.session.rollback()
+            if not db.session.get(Student, student_id):
+                flash('学生不存在', 'danger')
+            else:
+                flash('课程不存在', 'danger')
             return redirect(url_for('main.score_input'))
-
-        # 检查该学生的该课程成绩是否已存在
-        existing_score = Score.query.filter_by(
-            student_id=student_id,
-            course_id=course_id
-        ).first()
-
-        # 存在则更新，不存在则创建
-        if existing_score:
-            existing_score.score = score_value
-            flash('成绩已更新', 'success')
-        else:
-            score = Score(
-                student_id=student_id,
-                course_id=course_id,
-                score=score_value
-            )
-            db.session.add(score)
-            flash('成绩录入成功', 'success')
+        flash('成绩已保存', 'success')
 
         # 保存到数据库
         db.session.commit()
@@ -383,192 +420,195 @@ def score_input():
     return render_template('score/input.html')
 
 
+# 批量成绩录入功能：一次提交一门课程的多名学生成绩，在同一事务中写入
+@bp.route('/scores/batch', methods=['GET', 'POST'])
+@login_required
+def score_batch_input():
+    errors = []
+    if request.method == 'POST':
+        course_id = request.form.get('course_id', '')
+        rows = score_entry.parse_batch_text(request.form.get('rows', ''), course_id)
+
+        if len(rows) > score_entry.MAX_BATCH_ROWS:
+            flash(f'每次最多录入{score_entry.MAX_BATCH_ROWS}行', 'danger')
+        elif rows:
+            saved, errors = score_entry.batch_upsert(rows)
+            flash(f'已保存 {saved} 条成绩' + (f'，{len(errors)} 行有错误' if errors else ''),
+                  'warning' if errors else 'success')
+            if not errors:
+                return redirect(url_for('main.score_batch_input'))
+
+    # GET请求或存在错误行时显示批量录入表单（保留已输入的内容，便于修改后重新提交）
+    return render_template('score/batch.html', errors=errors)
+
+
+# 批量成绩录入接口（JSON）：{"rows": [{"student_id", "course_id", "score"}, ...]}，
+# 也可在顶层指定course_id作为各行的默认课程；返回写入行数和逐行错误
+@bp.route('/api/scores/batch', methods=['POST'])
+@login_required
+def score_batch_api():
+    payload = request.get_json(silent=True)
+    rows = payload.get('rows') if isinstance(payload, dict) else None
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        return jsonify({'error': '请求体必须为包含rows列表的JSON对象'}), 400
+    if len(rows) > score_entry.MAX_BATCH_ROWS:
+        return jsonify({'error': f'每次最多录入{score_entry.MAX_BATCH_ROWS}行'}), 400
+
+    if payload.get('course_id') is not None:
+        rows = [{'course_id': payload['course_id'], **row} for row in rows]
+    saved, errors = score_entry.batch_upsert(rows)
+    return jsonify({'saved': saved, 'errors': errors})
+
+
+# 数据导入功能：上传学生、课程或成绩的CSV/XLSX文件，分块校验并写入
+@bp.route('/import', methods=['GET', 'POST'])
+@login_required
+def data_import():
+    result = None
+    if request.method == 'POST':
+        kind = request.form.get('kind')
+        upload = request.files.get('file')
+        if kind not in importer.KINDS or not upload or not upload.filename:
+            flash('请选择数据类型和要导入的文件', 'danger')
+            return redirect(url_for('main.data_import'))
+
+        # 上传文件先保存到临时文件，再按块流式读取，不在内存中保留整个文件
+        extension = os.path.splitext(upload.filename)[1].lower()
+        fd, path = tempfile.mkstemp(suffix=extension)
+        os.close(fd)
+        try:
+            upload.save(path)
+            result = importer.import_file(path, kind)
+            flash(f'已导入 {result.imported} 行' + (f'，跳过 {result.skipped} 行' if result.skipped else ''),
+                  'warning' if result.skipped else 'success')
+        except importer.DataImportError as e:
+            # 已提交的数据块会保留；导入为UPSERT，修正后重新上传同一文件即可
+            flash(f'导入失败：{e}', 'danger')
+        finally:
+            for leftover in (path, path + '.import-progress.json'):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+
+    return render_template('import.html', result=result)
+
+
 # 成绩查询功能：根据学生或课程筛选成绩记录
 @bp.route('/scores/query')
 @login_required
 def score_query():
-    # 获取查询参数（学生ID和课程ID）
+    # 获取查询参数（学生ID、课程ID、分页游标，以及是否一次性流式输出全部结果）
     student_id = request.args.get('student_id')
     course_id = request.args.get('course_id')
-
-    # 构建查询（关联成绩、学生、课程表）
-    query = db.session.query(Score, Student, Course). \
-        join(Student, Score.student_id == Student.student_id). \
-        join(Course, Score.course_id == Course.course_id)
-
-    # 根据参数筛选
-    if student_id:
-        query = query.filter(Score.student_id == student_id)
-    if course_id:
-        query = query.filter(Score.course_id == course_id)
-
-    # 执行查询
-    results = query.all()
-
-    # 整理数据用于模板显示
-    scores = []
-    for score, student, course in results:
-        scores.append({
-            'student_id': score.student_id,
-            'student_name': student.name,
-            'course_id': score.course_id,
-            'course_name': course.course_name,
-            'score': score.score
-        })
-
-    # 获取所有学生和课程用于查询表单的下拉菜单
-    students = Student.query.all()
-    courses = Course.query.all()
-
-    # 渲染成绩查询结果模板
+    after = request.args.get('after')
+    before = request.args.get('before')
+    stream = request.args.get('stream') == '1'
+    per_page = 50  # 每页显示50条记录
+
+    if stream:
+        # 流式模式：按批次读取结果并边渲染边输出，内存占用与匹配的记录数无关
+        return stream_template('score/query.html',
+                               scores=export.stream_scores(student_id, course_id),
+                               pagination=None,
+                               student_id=student_id or '',
+                               course_id=course_id or '')
+
+    # 分页模式：按成绩ID进行键集分页，每次只读取一页
+    scores = KeysetPagination(export.score_statement(student_id, course_id), Score.id, 'id',
+                              per_page=per_page, after=after, before=before)
+
+    # 渲染成绩查询结果模板（学生、课程候选项由自动补全接口按需提供）
     return render_template('score/query.html',
                            scores=scores,
-                           students=students,
-                           courses=courses,
+                           pagination=scores,
                            student_id=student_id or '',
                            course_id=course_id or '')
 
 
-# 数据可视化功能：展示成绩分布、专业对比等统计图表数据
+# 成绩导出功能（CSV）：筛选条件与成绩查询相同，边读取边分块输出，内存占用与记录数无关
+@bp.route('/scores/export.csv')
+@login_required
+def score_export_csv():
+    rows = export.stream_scores(request.args.get('student_id'), request.args.get('course_id'))
+    response = Response(stream_with_context(export.iter_csv(rows)), mimetype='text/csv; charset=utf-8')
+    response.headers['Content-Disposition'] = 'attachment; filename=scores.csv'
+    return response
+
+
+# 成绩导出功能（XLSX）：使用xlsxwriter的constant_memory模式写入临时文件后下载
+@bp.route('/scores/export.xlsx')
+@login_required
+def score_export_xlsx():
+    rows = export.stream_scores(request.args.get('student_id'), request.args.get('course_id'))
+    output = tempfile.TemporaryFile()
+    export.write_xlsx(rows, output)
+    output.seek(0)
+    return send_file(output, as_attachment=True, download_name='scores.xlsx',
+                     mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+
+
+# 学生自动补全接口：按学号或姓名前缀返回候选学生
+@bp.route('/api/students/suggest')
+@login_required
+def student_suggest():
+    return jsonify(search_index.suggest_students(request.args.get('q', '')))
+
+
+# 课程自动补全接口：按课程ID或名称前缀返回候选课程
+@bp.route('/api/courses/suggest')
+@login_required
+def course_suggest():
+    return jsonify(search_index.suggest_courses(request.args.get('q', '')))
+
+
+# 数据可视化功能：展示成绩分布、专业对比等统计图表
 @bp.route('/visualization')
 @login_required
 def visualization():
-    # 1. 整体成绩分布数据（按分数段统计）
-    distribution = {
-        '<60': 0,
-        '60-70': 0,
-        '70-80': 0,
-        '80-90': 0,
-        '90-100': 0
-    }
-
-    scores = Score.query.all()
-    for score in scores:
-        if score.score < 60:
-            distribution['<60'] += 1
-        elif score.score < 70:
-            distribution['60-70'] += 1
-        elif score.score < 80:
-            distribution['70-80'] += 1
-        elif score.score < 90:
-            distribution['80-90'] += 1
-        else:
-            distribution['90-100'] += 1
-
-    # 2. 专业平均分数据
-    majors = [
-        "数据科学",
-        "计算机科学",
-        "软件工程",
-        "人工智能",
-        "网络安全"
-    ]
-
-    major_scores = []
-    for major in majors:
-        # 查询该专业的所有学生
-        students = Student.query.filter_by(major=major).all()
-        student_ids = [s.student_id for s in students]
-
-        # 计算该专业所有学生的平均成绩
-        avg_score = db.session.query(
-            db.func.avg(Score.score)
-        ).filter(Score.student_id.in_(student_ids)).scalar()
-
-        # 无成绩时默认70分
-        major_scores.append(round(avg_score or 70, 1))
-
-    # 3. 课程平均分及箱线图数据
-    # 按课程ID排序查询所有课程
-    courses = Course.query.order_by(Course.course_id).all()
-    course_names = []  # 课程名称列表
-    course_avgs = []   # 课程平均分列表
-    boxplot_data = []  # 箱线图数据（用于展示成绩分布）
-
-    # 按课程分类收集成绩
-    course_scores = {}
-    for course in courses:
-        course_names.append(course.course_name)
-        scores_for_course = [s.score for s in course.scores]
-        course_scores[course.course_id] = scores_for_course
-
-        # 计算课程平均分
-        avg_score = db.session.query(
-            db.func.avg(Score.score)
-        ).filter_by(course_id=course.course_id).scalar()
-        course_avgs.append(round(avg_score or 0, 1))
-
-    # 计算箱线图所需的统计指标（最小值、下四分位数、中位数、上四分位数、最大值）
-    for course_id in sorted(course_scores.keys()):
-        scores_for_course = course_scores[course_id]
-
-        if scores_for_course:
-            min_val = max(min(scores_for_course), 50)  # 确保最低分不低于50
-            max_val = max(scores_for_course)
-            sorted_scores = sorted(scores_for_course)
-            n = len(sorted_scores)
-
-            # 计算中位数
-            if n % 2 == 1:
-                median = sorted_scores[n // 2]
-            else:
-                median = (sorted_scores[n // 2 - 1] + sorted_scores[n // 2]) / 2.0
-
-            # 计算下四分位数 (Q1)
-            q1_pos = n // 4
-            q1 = sorted_scores[q1_pos] if n % 4 != 0 else (sorted_scores[q1_pos - 1] + sorted_scores[q1_pos]) / 2.0
-
-            # 计算上四分位数 (Q3)
-            q3_pos = 3 * n // 4
-            q3 = sorted_scores[q3_pos] if n % 4 != 0 else (sorted_scores[q3_pos - 1] + sorted_scores[q3_pos]) / 2.0
-
-            boxplot_data.append([min_val, q1, median, q3, max_val])
-        else:
-            # 无成绩时使用默认值
-            boxplot_data.append([60, 68, 75, 82, 90])
-
-    # 4. 生源地分布数据（统计各地区的学生数量）
-    hometowns = db.session.query(
-        Student.hometown,
-        db.func.count(Student.student_id)
-    ).group_by(Student.hometown).all()
-
-    hometown_names = [h[0] for h in hometowns]  # 生源地名称
-    hometown_counts = [h[1] for h in hometowns]  # 各生源地学生数量
-
-    # 5. 各课程成绩分布数据
-    course_distributions = {}
-    for course in courses:
-        course_dist = {
-            '<60': 0,
-            '60-70': 0,
-            '70-80': 0,
-            '80-90': 0,
-            '90-100': 0
-        }
-        # 统计该课程各分数段的人数
-        for score in course.scores:
-            if score.score < 60:
-                course_dist['<60'] += 1
-            elif score.score < 70:
-                course_dist['60-70'] += 1
-            elif score.score < 80:
-                course_dist['70-80'] += 1
-            elif score.score < 90:
-                course_dist['80-90'] += 1
-            else:
-                course_dist['90-100'] += 1
-        course_distributions[course.course_id] = course_dist
-
-    # 渲染可视化页面模板，传递所有统计数据
-    return render_template('visualization/index.html',
-                           distribution=distribution,
-                           course_distributions=course_distributions,
-                           major_scores=major_scores,
-                           majors=majors,
-                           course_names=course_names,
-                           course_avgs=course_avgs,
-                           boxplot_data=boxplot_data,
-                           hometown_names=hometown_names,
-                           hometown_counts=hometown_counts,
-                           courses=courses)
\ No newline at end of file
+    # 页面本身不含统计数据，各图表通过 /api/stats/<chart> 接口并行获取
+    return render_template('visualization/index.html')
+
+
+# 统计图表数据接口：返回单个图表的JSON数据，支持ETag条件请求
+@bp.route('/api/stats/<chart>')
+@login_required
+def stats_api(chart):
+    # 未知的图表名称返回404
+    compute = analytics.CHARTS.get(chart)
+    if compute is None:
+        abort(404)
+
+    # ETag由数据库中的数据版本号生成，数据未变化时直接返回304，不重新计算也不重新发送
+    version = stats_cache.current_version()
+    etag = stats_cache.etag(chart, version)
+    if request.if_none_match.contains(etag):
+        monitoring.record_cache('etag', True)
+        response = make_response('', 304)
+    else:
+        monitoring.record_cache('etag', False)
+        response = jsonify(stats_cache.get(('chart', chart), compute))
+
+    # 要求浏览器每次使用前向服务器验证缓存
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+# 请求性能统计页面：各端点最近请求的耗时、SQL语句数和返回行数，以及累计耗时最多的SQL语句
+# format=json 时返回JSON数据
+@bp.route('/debug/metrics')
+@login_required
+def debug_metrics():
+    endpoints = request_metrics.endpoint_summary()
+    statements = request_metrics.slowest_statements()
+    if request.args.get('format') == 'json':
+        return jsonify({'endpoints': endpoints, 'statements': statements})
+    return render_template('debug/metrics.html', endpoints=endpoints, statements=statements,
+                           window=request_metrics.window)
+
+
+# Prometheus监控指标接口（文本格式，供Prometheus抓取，不要求登录）
+@bp.route('/metrics')
+def prometheus_metrics():
+    data, content_type = monitoring.render()
+    return Response(data, content_type=content_type)
@@ -0,0 +1,101 @@
+from pathlib import Path
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# 只读连接在 SQLALCHEMY_BINDS 中的名称
+READ_BIND = 'read'
+
+# 默认使用只读连接的请求方法
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# 只读连接不设置日志模式和同步方式（由主连接设置），并禁止写入
+_PRIMARY_ONLY_PRAGMAS = ('journal_mode', 'synchronous')
+
+
+def read_uri(uri):
+    """由主数据库URI生成以只读方式（mode=ro）打开同一数据库文件的URI；内存数据库返回None"""
+    url = make_url(uri)
+    if not url.drivername.startswith('sqlite') or url.database in (None, '', ':memory:'):
+        return None
+    return f'{url.drivername}:///file:{Path(url.database).resolve().as_posix()}?mode=ro&uri=true'
+
+
+def configure(app):
+    """在初始化数据库扩展之前调用：启用读写分离时将只读连接加入 SQLALCHEMY_BINDS
+
+    SQLALCHEMY_READ_DATABASE_URI 可指定只读副本，未指定时以只读方式打开主数据库文件
+    """
+    app.config.setdefault('READ_ONLY_ROUTING', True)
+    if not app.config['READ_ONLY_ROUTING']:
+        return
+    uri = app.config.get('SQLALCHEMY_READ_DATABASE_URI') or read_uri(app.config['SQLALCHEMY_DATABASE_URI'])
+    if uri is not None:
+        app.config['SQLALCHEMY_BINDS'] = {**(app.config.get('SQLALCHEMY_BINDS') or {}), READ_BIND: uri}
+
+
+def init_app(app):
+    """只读连接的每个新连接执行与主连接相同的PRAGMA（日志模式、同步方式除外），并开启query_only"""
+    # 延迟导入，避免循环导入问题
+    from app import db
+    from app.pragmas import apply_pragmas
+
+    with app.app_context():
+        engine = db.engines.get(READ_BIND)
+    if engine is None:
+        return
+
+    pragmas = {name: value for name, value in (app.config.get('SQLITE_PRAGMAS') or {}).items()
+               if name not in _PRIMARY_ONLY_PRAGMAS}
+    pragmas['query_only'] = 'ON'
+
+    def set_pragmas(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas)
+
+    event.listen(engine, 'connect', set_pragmas)
+
+
+def read_only(view):
+    """视图装饰器：该视图的所有请求使用只读连接（如以POST提交的查询）"""
+    view.db_route = 'read'
+    return view
+
+
+def primary(view):
+    """视图装饰器：该视图的所有请求使用主连接（如GET请求中需要读取刚写入的数据）"""
+    view.db_route = 'primary'
+    return view
+
+
+def use_primary():
+    """在当前请求的剩余部分改用主连接（如视图中根据请求参数决定写入时调用）"""
+    g.db_route = 'primary'
+
+
+def _route():
+    """当前请求使用的连接：请求中的覆盖设置 > 视图装饰器 > 按请求方法自动判断；不在请求中时使用主连接"""
+    if not has_request_context():
+        return 'primary'
+    route = g.get('db_route')
+    if route is None:
+        view = current_app.view_functions.get(request.endpoint)
+        route = getattr(view, 'db_route', None)
+    if route is None:
+        route = 'read' if request.method in SAFE_METHODS else 'primary'
+    return route
+
+
+class RoutingSession(Session):
+    """读写分离的会话：只读请求中的查询使用只读连接，写入始终使用主连接
+
+    只有明确为查询语句（非INSERT/UPDATE/DELETE）时才使用只读连接；flush及ORM批量写入时
+    只传入映射而不传入语句，这类调用一律使用主连接
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and clause is not None and not self._flushing and not getattr(clause, 'is_dml', False):
+            engine = self._db.engines.get(READ_BIND)
+            if engine is not None and _route() == 'read':
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
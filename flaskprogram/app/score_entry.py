@@ -0,0 +1,107 @@
+import re
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app import db
+from app.models import Student, Course, Score
+
+# 成绩取值范围
+MIN_SCORE = 0
+MAX_SCORE = 100
+
+# 单次批量录入允许的最大行数
+MAX_BATCH_ROWS = 5000
+
+# 课程ID：1至18位ASCII数字，保证在SQLite整数范围内（str.isdigit()还会接受'²'等字符）
+_COURSE_ID = re.compile(r'[0-9]{1,18}')
+
+
+def parse_score(value):
+    """将输入转换为成绩分数，不是数字或超出范围时抛出ValueError（异常信息可直接展示给用户）"""
+    try:
+        score = float(value)
+    except (TypeError, ValueError):
+        raise ValueError('成绩必须为数字')
+    if not MIN_SCORE <= score <= MAX_SCORE:
+        raise ValueError(f'成绩必须在{MIN_SCORE}到{MAX_SCORE}之间')
+    return score
+
+
+def _text(value):
+    """将输入字段转为去除首尾空白的字符串，None视为空（0等值保留）"""
+    return '' if value is None else str(value).strip()
+
+
+def upsert_statement():
+    """成绩UPSERT语句：（学号，课程ID）已有成绩时更新分数，否则插入（依赖唯一索引）"""
+    statement = sqlite_insert(Score)
+    return statement.on_conflict_do_update(
+        index_elements=[Score.student_id, Score.course_id],
+        set_={'score': statement.excluded.score}
+    )
+
+
+def _existing(column, values):
+    """一次集合查询返回values中在数据库里存在的值"""
+    if not values:
+        return set()
+    return set(db.session.execute(db.select(column).where(column.in_(values))).scalars())
+
+
+def batch_upsert(rows):
+    """批量录入成绩：两次集合查询校验学号和课程ID，有效行在同一事务中以executemany一次写入
+
+    rows 为 {'student_id', 'course_id', 'score'} 字典列表，可用'row'字段指定行号（必须为整数，否则按顺序从1编号）；
+    返回 (写入行数, 错误列表)，错误列表中每项为 {'row': 行号, 'error': 错误信息}，有错误的行不会写入
+    """
+    errors = []
+    parsed = []
+    for index, row in enumerate(rows, 1):
+        number = row.get('row')
+        if not isinstance(number, int) or isinstance(number, bool):
+            number = index
+        try:
+            student_id = _text(row.get('student_id'))
+            course_id = _text(row.get('course_id'))
+            if not student_id or not course_id:
+                raise ValueError('学号和课程ID不能为空')
+            if not _COURSE_ID.fullmatch(course_id):
+                raise ValueError('课程ID必须为整数')
+            score = parse_score(row.get('score'))
+        except ValueError as e:
+            errors.append({'row': number, 'error': str(e)})
+            continue
+        parsed.append((number, student_id, int(course_id), score))
+
+    students = _existing(Student.student_id, {student_id for _, student_id, _, _ in parsed})
+    courses = _existing(Course.course_id, {course_id for _, _, course_id, _ in parsed})
+
+    values = []
+    for number, student_id, course_id, score in parsed:
+        if student_id not in students:
+            errors.append({'row': number, 'error': f'学生 {student_id} 不存在'})
+        elif course_id not in courses:
+            errors.append({'row': number, 'error': f'课程 {course_id} 不存在'})
+        else:
+            values.append({'student_id': student_id, 'course_id': course_id, 'score': score})
+
+    if values:
+        db.session.execute(upsert_statement(), values)
+        db.session.commit()
+
+    errors.sort(key=lambda error: error['row'])
+    return len(values), errors
+
+
+def parse_batch_text(text, course_id):
+    """解析批量录入表单的文本，每行为“学号 成绩”（空格、逗号或制表符分隔），跳过空行，行号与输入框中的行对应"""
+    rows = []
+    for number, line in enumerate(text.splitlines(), 1):
+        fields = line.replace(',', ' ').replace('，', ' ').split()
+        if not fields:
+            continue
+        rows.append({
+            'row': number,
+            'student_id': fields[0],
+            'course_id': course_id,
+            'score': fields[1] if len(fields) > 1 else None
+        })
+    return rows
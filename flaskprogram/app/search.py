@@ -0,0 +1,222 @@
+import re
+from sqlalchemy.exc import OperationalError
+from app import db
+from app.models import Student, Course
+
+# 参与全文检索的学生字段
+FTS_COLUMNS = ('student_id', 'name', 'major', 'class', 'hometown')
+
+# trigram分词至少需要3个字符，更短的关键词回退到LIKE查询
+MIN_FTS_LENGTH = 3
+
+# 学生全文索引（外部内容表，只保存索引，数据仍存放在student表中）
+_CREATE_INDEX = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS student_fts USING fts5("
+    + ", ".join(FTS_COLUMNS)
+    + ", content='student', content_rowid='rowid', tokenize='trigram')"
+)
+
+_NEW_VALUES = ", ".join("NEW.%s" % column for column in FTS_COLUMNS)
+_OLD_VALUES = ", ".join("OLD.%s" % column for column in FTS_COLUMNS)
+_COLUMN_LIST = ", ".join(FTS_COLUMNS)
+
+# student表上的触发器：插入、删除、修改学生信息时同步维护全文索引
+TRIGGERS = {
+    'student_fts_insert': (
+        "CREATE TRIGGER IF NOT EXISTS student_fts_insert AFTER INSERT ON student BEGIN "
+        f"INSERT INTO student_fts (rowid, {_COLUMN_LIST}) VALUES (NEW.rowid, {_NEW_VALUES}); "
+        "END"
+    ),
+    'student_fts_delete': (
+        "CREATE TRIGGER IF NOT EXISTS student_fts_delete AFTER DELETE ON student BEGIN "
+        f"INSERT INTO student_fts (student_fts, rowid, {_COLUMN_LIST}) VALUES ('delete', OLD.rowid, {_OLD_VALUES}); "
+        "END"
+    ),
+    'student_fts_update': (
+        "CREATE TRIGGER IF NOT EXISTS student_fts_update AFTER UPDATE ON student BEGIN "
+        f"INSERT INTO student_fts (student_fts, rowid, {_COLUMN_LIST}) VALUES ('delete', OLD.rowid, {_OLD_VALUES}); "
+        f"INSERT INTO student_fts (rowid, {_COLUMN_LIST}) VALUES (NEW.rowid, {_NEW_VALUES}); "
+        "END"
+    ),
+}
+
+# 全文索引表的轻量描述，用于构造查询（不属于模型元数据，不会被create_all创建）
+student_fts = db.table('student_fts', db.column('rowid'), db.column('student_fts'), db.column('rank'))
+
+# 当前SQLite是否支持FTS5全文索引
+fts_available = False
+
+
+def install_index():
+    """创建学生全文索引及触发器；索引此前不存在时从student表重建"""
+    global fts_available
+
+    existing = set(db.session.execute(db.text(
+        "SELECT name FROM sqlite_master WHERE name = 'student_fts' OR name LIKE 'student_fts_%'"
+    )).scalars())
+
+    try:
+        db.session.execute(db.text(_CREATE_INDEX))
+    except OperationalError:
+        # SQLite未编译FTS5或不支持trigram分词，搜索回退到LIKE查询
+        db.session.rollback()
+        fts_available = False
+        return
+
+    for name, ddl in TRIGGERS.items():
+        db.session.execute(db.text(ddl))
+    if not {'student_fts', *TRIGGERS} <= existing:
+        db.session.execute(db.text("INSERT INTO student_fts (student_fts) VALUES ('rebuild')"))
+    db.session.commit()
+    fts_available = True
+
+
+def _fts_phrase(keyword):
+    """将关键词转为FTS5短语查询（子串匹配），并转义其中的双引号"""
+    return '"' + keyword.replace('"', '""') + '"'
+
+
+def search_students(keyword):
+    """按关键词搜索学生（学号、姓名、专业、班级、生源地），返回排序后的查询对象
+
+    使用全文索引时按相关度（bm25）排序，相关度相同时按索引rowid排序，保证按偏移量分页时顺序稳定；
+    回退到LIKE查询时按学号排序
+    """
+    keyword = keyword.strip()
+    if fts_available and len(keyword) >= MIN_FTS_LENGTH:
+        return Student.query.join(
+            student_fts, student_fts.c.rowid == db.literal_column('student.rowid')
+        ).filter(
+            student_fts.c.student_fts.op('MATCH')(_fts_phrase(keyword))
+        ).order_by(student_fts.c.rank, student_fts.c.rowid)
+
+    # 关键词过短时无法使用trigram索引，回退到LIKE查询
+    return Student.query.filter(
+        (Student.student_id.contains(keyword)) |
+        (Student.name.contains(keyword)) |
+        (Student.major.contains(keyword)) |
+        (Student.class_.contains(keyword)) |
+        (Student.hometown.contains(keyword))
+    ).order_by(Student.student_id)
+
+
+
+def prefix_range(column, prefix):
+    """将前缀匹配改写为索引上的范围条件：prefix <= column < prefix + 最大字符"""
+    return [column >= prefix, column < prefix + '\U0010ffff']
+
+
+# 课程搜索中可用于比较的字段（支持中英文写法）
+COURSE_FIELDS = {
+    'id': Course.course_id,
+    'course_id': Course.course_id,
+    '课程id': Course.course_id,
+    'credit': Course.credit,
+    '学分': Course.credit,
+}
+
+# 比较条件，例如 credit>=3、学分<4、id=2
+_COMPARISON = re.compile(r'^(?P<field>[^<>=]+?)\s*(?P<op>>=|<=|>|<|=)\s*(?P<value>[0-9]+)$')
+
+# 整数：只接受ASCII数字（str.isdigit()还会接受'²'等字符），且不超过SQLite整数（64位）的范围
+_INTEGER = re.compile(r'[0-9]+')
+MAX_INTEGER = 2 ** 63 - 1
+
+_OPERATORS = {
+    '>=': lambda column, value: column >= value,
+    '<=': lambda column, value: column <= value,
+    '>': lambda column, value: column > value,
+    '<': lambda column, value: column < value,
+    '=': lambda column, value: column == value,
+}
+
+
+def parse_integer(text):
+    """将搜索输入解析为可用于整数列比较的值，不是ASCII数字或超出64位整数范围时返回None"""
+    if not _INTEGER.fullmatch(text):
+        return None
+    value = int(text)
+    return value if value <= MAX_INTEGER else None
+
+
+def parse_course_query(text):
+    """将课程搜索框的输入解析为可走索引的查询条件列表（多个条件之间为AND关系）
+
+    - 纯数字：按课程ID或学分精确查找
+    - credit>=3、学分<4、id=2 等：按字段进行比较或范围查找
+    - 其他文本（包括超出整数范围的数字）：按课程名称前缀查找
+    """
+    criteria = []
+    for token in re.sub(r'\s*(>=|<=|>|<|=)\s*', r'\1', text.strip()).split():
+        value = parse_integer(token)
+        comparison = _COMPARISON.match(token)
+        bound = parse_integer(comparison.group('value')) if comparison else None
+        if value is not None:
+            # 学分取值很少，不加提示时优化器认为OR条件选择性低而全表扫描；提示后分别走主键和学分索引（MULTI-INDEX OR）
+            criteria.append(db.func.likelihood((Course.course_id == value) | (Course.credit == value),
+                                               db.literal_column('0.001')))
+        elif bound is not None and comparison.group('field').lower() in COURSE_FIELDS:
+            column = COURSE_FIELDS[comparison.group('field').lower()]
+            op = comparison.group('op')
+            condition = _OPERATORS[op](column, bound)
+            # 范围条件用likelihood()提示查询优化器该条件选择性高，应使用索引而不是按课程ID顺序全表扫描
+            criteria.append(condition if op == '=' else db.func.likelihood(condition, db.literal_column('0.001')))
+        else:
+            # 名称前缀匹配改写为索引上的范围查询
+            criteria.extend(prefix_range(Course.course_name, token))
+    return criteria
+
+
+def search_courses(text):
+    """按解析后的条件搜索课程，返回未排序的查询对象"""
+    return Course.query.filter(*parse_course_query(text))
+
+
+# 自动补全返回的最大条数
+SUGGEST_LIMIT = 10
+
+
+def suggest_students(prefix, limit=SUGGEST_LIMIT):
+    """按学号或姓名前缀返回学生候选项，两次查询均只读取覆盖索引"""
+    prefix = prefix.strip()
+    if not prefix:
+        return []
+
+    suggestions = {}
+    for column in (Student.student_id, Student.name):
+        rows = db.session.execute(
+            db.select(Student.student_id, Student.name)
+            .where(*prefix_range(column, prefix))
+            .order_by(column)
+            .limit(limit)
+        )
+        for student_id, name in rows:
+            suggestions.setdefault(student_id, name)
+    return [{'id': student_id, 'name': name} for student_id, name in list(suggestions.items())[:limit]]
+
+
+def suggest_courses(prefix, limit=SUGGEST_LIMIT):
+    """按课程ID或课程名称前缀返回课程候选项"""
+    prefix = prefix.strip()
+    if not prefix:
+        return []
+
+    suggestions = {}
+    course_id = parse_integer(prefix)
+    if course_id is not None:
+        # 课程ID为整数，按精确值查找
+        course = db.session.execute(
+            db.select(Course.course_id, Course.course_name).where(Course.course_id == course_id)
+        ).first()
+        if course:
+            suggestions[course.course_id] = course.course_name
+
+    rows = db.session.execute(
+        db.select(Course.course_id, Course.course_name)
+        .where(*prefix_range(Course.course_name, prefix))
+        .order_by(Course.course_name)
+        .limit(limit)
+    )
+    for course_id, course_name in rows:
+        suggestions.setdefault(course_id, course_name)
+    return [{'id': course_id, 'name': name} for course_id, name in list(suggestions.items())[:limit]]
@@ -0,0 +1,78 @@
+import math
+import numpy as np
+from derived_tables import BIN_COUNT, BINS_PER_POINT
+
+# 成绩直方图的精度（按0.1分分箱，分箱数量与分箱规则见 derived_tables）
+RESOLUTION = 0.1
+
+
+def score_to_bin(score):
+    """将成绩映射到对应的箱编号 floor(成绩 * 10 + 0.5)，超出范围的值归入两端的箱
+
+    与分箱计数表触发器中的表达式一致（derived_tables.BIN_SQL），两侧对同一成绩得到同一个箱
+    """
+    index = math.floor(float(score) * BINS_PER_POINT + 0.5)
+    return min(max(index, 0), BIN_COUNT - 1)
+
+
+class ScoreHistogram:
+    """单门课程的成绩直方图，以O(箱数)的代价回答分位数查询"""
+
+    def __init__(self, counts=None):
+        self.counts = np.zeros(BIN_COUNT, dtype=np.int64) if counts is None else counts
+        self.total = int(self.counts.sum())
+
+    def add(self, score, count=1):
+        """加入（count为负数时移除）一个成绩"""
+        self.counts[score_to_bin(score)] += count
+        self.total += count
+
+    def quantiles(self, qs):
+        """计算多个分位数（线性插值，与numpy.percentile默认方法一致）"""
+        if self.total == 0:
+            return [None for _ in qs]
+
+        # 每个分位数需要相邻两个排名上的值进行插值，排名对应的箱由累计计数二分查找得到
+        positions = (self.total - 1) * np.asarray(qs, dtype=float)
+        lower_ranks = np.floor(positions).astype(np.int64)
+        upper_ranks = np.minimum(lower_ranks + 1, self.total - 1)
+        cumulative = np.cumsum(self.counts)
+        lower = np.round(np.searchsorted(cumulative, lower_ranks, side='right') * RESOLUTION, 1)
+        upper = np.round(np.searchsorted(cumulative, upper_ranks, side='right') * RESOLUTION, 1)
+        return (lower + (upper - lower) * (positions - lower_ranks)).tolist()
+
+    def quantile(self, q):
+        """计算单个分位数"""
+        return self.quantiles([q])[0]
+
+    def boxplot(self):
+        """返回箱线图所需的五个统计量（最小值、下四分位数、中位数、上四分位数、最大值）"""
+        min_val, q1, median, q3, max_val = self.quantiles([0, 0.25, 0.5, 0.75, 1])
+        return [max(min_val, 50), q1, median, q3, max_val]  # 确保最低分不低于50
+
+
+def load_histograms():
+    """从触发器维护的分箱计数表读取所有课程的成绩直方图，返回 {课程ID: ScoreHistogram}
+
+    每门课程最多读取BIN_COUNT行，与成绩数量无关，无需扫描成绩表
+    """
+    # 延迟导入，避免循环导入问题
+    from app import db
+    from app.models import ScoreBinCount
+
+    rows = db.session.execute(
+        db.select(ScoreBinCount.course_id, ScoreBinCount.bin, ScoreBinCount.count)
+        .where(ScoreBinCount.count != 0)
+    ).all()
+    if not rows:
+        return {}
+
+    # 按课程用bincount把（箱，数量）累加为直方图
+    course_ids, bins, counts = (np.asarray(column) for column in zip(*rows))
+    histograms = {}
+    for course_id in np.unique(course_ids):
+        mask = course_ids == course_id
+        histograms[int(course_id)] = ScoreHistogram(
+            np.bincount(bins[mask], weights=counts[mask], minlength=BIN_COUNT).astype(np.int64)
+        )
+    return histograms
@@ -0,0 +1,159 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from logging.handlers import RotatingFileHandler
+from flask import current_app, has_request_context, request
+from sqlalchemy import event
+from app.metrics import listen_query_time, normalize_sql, query_elapsed, untracked_cursor
+
+# 慢查询阈值（毫秒）
+THRESHOLD_MS = 100
+
+# 慢查询日志文件的轮转大小及保留的旧文件数
+MAX_BYTES = 10 * 1024 * 1024
+BACKUP_COUNT = 5
+
+# 日志中每个参数值保留的最大字符数（超出部分截断）
+MAX_PARAMETER_LENGTH = 200
+
+# 可以执行 EXPLAIN QUERY PLAN 的语句
+_EXPLAINABLE = re.compile(r'^\s*(SELECT|WITH|UPDATE|DELETE|INSERT)\b', re.IGNORECASE)
+
+# 查询计划中对学生表或成绩表的全表扫描（含SQLAlchemy生成的别名如 student_1）
+_TABLE_SCAN = re.compile(r'^SCAN (student|score)(_\d+)?\b')
+
+logger = logging.getLogger('flaskprogram.slowlog')
+logger.propagate = False
+
+
+def init_app(app):
+    """读取慢查询配置，配置日志文件并注册数据库引擎事件；SLOW_QUERY_MS为None时不记录慢查询"""
+    # 延迟导入，避免循环导入问题
+    from app import db
+
+    app.config.setdefault('SLOW_QUERY_MS', THRESHOLD_MS)
+    app.config.setdefault('SLOW_QUERY_LOG', os.path.join(os.path.dirname(app.root_path), 'slow-queries.jsonl'))
+    if app.config['SLOW_QUERY_MS'] is None:
+        return
+
+    path = os.path.abspath(app.config['SLOW_QUERY_LOG'])
+    if not any(getattr(handler, 'baseFilename', None) == path for handler in logger.handlers):
+        handler = RotatingFileHandler(path, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT, encoding='utf-8', delay=True)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+    app.extensions['slow_query_log'] = path
+
+    # 主连接和只读连接（读写分离时）都需要记录
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        listen_query_time(engine)
+        if not event.contains(engine, 'after_cursor_execute', _after_cursor_execute):
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """请求中的语句执行超过阈值时，连同参数、端点、耗时和查询计划写入慢查询日志
+    （SELECT语句只计执行时间，不含之后读取结果的时间）"""
+    if not has_request_context() or 'slow_query_log' not in current_app.extensions:
+        return
+    elapsed = query_elapsed(context)
+    if elapsed * 1000 < current_app.config['SLOW_QUERY_MS']:
+        return
+
+    logger.info(json.dumps({
+        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'endpoint': request.endpoint,
+        'duration_ms': round(elapsed * 1000, 3),
+        'sql': statement,
+        'parameters': summarize_parameters(parameters, executemany),
+        'executemany': executemany,
+        'plan': [] if executemany else explain(conn.connection.dbapi_connection, statement, parameters),
+    }, ensure_ascii=False, default=str))
+
+
+def _truncate(value):
+    """截断过长的字符串参数，二进制参数只记录长度"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f'<{len(value)} bytes>'
+    if isinstance(value, str) and len(value) > MAX_PARAMETER_LENGTH:
+        return value[:MAX_PARAMETER_LENGTH] + f'...（共 {len(value)} 个字符）'
+    return value
+
+
+def _truncate_row(row):
+    """截断一组参数（元组或字典）中的每个值"""
+    if isinstance(row, dict):
+        return {name: _truncate(value) for name, value in row.items()}
+    if isinstance(row, (list, tuple)):
+        return [_truncate(value) for value in row]
+    return _truncate(row)
+
+
+def summarize_parameters(parameters, executemany):
+    """日志中记录的参数：executemany只记录行数和第一行，避免批量写入时把全部数据写入日志；过长的值截断"""
+    if executemany:
+        rows = list(parameters or ())
+        return {'rows': len(rows), 'first': _truncate_row(rows[0]) if rows else None}
+    return _truncate_row(parameters)
+
+
+def explain(dbapi_connection, statement, parameters):
+    """在同一连接上执行 EXPLAIN QUERY PLAN，返回查询计划各步骤的描述；无法分析的语句返回空列表"""
+    if not _EXPLAINABLE.match(statement):
+        return []
+    cursor = untracked_cursor(dbapi_connection)
+    try:
+        return [row[3] for row in cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters or ())]
+    except sqlite3.Error:
+        return []
+    finally:
+        cursor.close()
+
+
+def table_scans(plan):
+    """返回查询计划中对学生表或成绩表的全表扫描步骤"""
+    return [step for step in plan if _TABLE_SCAN.match(step)]
+
+
+def read_entries(path):
+    """按时间顺序读取慢查询日志（含轮转出的旧文件），跳过无法解析的行"""
+    paths = [f'{path}.{index}' for index in range(BACKUP_COUNT, 0, -1)] + [path]
+    for name in paths:
+        if not os.path.exists(name):
+            continue
+        with open(name, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def summarize(entries, limit=20):
+    """按归一化SQL汇总慢查询，返回累计耗时最多的limit条语句"""
+    groups = {}
+    for entry in entries:
+        key = normalize_sql(entry['sql'])
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {'sql': key, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                                   'endpoints': set(), 'plan': []}
+        group['count'] += 1
+        group['total_ms'] += entry['duration_ms']
+        group['max_ms'] = max(group['max_ms'], entry['duration_ms'])
+        if entry.get('endpoint'):
+            group['endpoints'].add(entry['endpoint'])
+        # 保留最近一次的查询计划
+        group['plan'] = entry.get('plan') or group['plan']
+
+    summary = sorted(groups.values(), key=lambda group: group['total_ms'], reverse=True)[:limit]
+    for group in summary:
+        group['avg_ms'] = group['total_ms'] / group['count']
+        group['endpoints'] = sorted(group['endpoints'])
+        group['scans'] = table_scans(group['plan'])
+    return summary
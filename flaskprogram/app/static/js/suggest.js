@@ -0,0 +1,42 @@
+// 输入框自动补全：输入时向后端请求候选项，填充到关联的 datalist 中
+function bindSuggest(inputId, url) {
+    const input = document.getElementById(inputId);
+    if (!input) {
+        return;
+    }
+
+    // 创建与输入框关联的 datalist
+    const datalist = document.createElement('datalist');
+    datalist.id = inputId + '-suggestions';
+    input.setAttribute('list', datalist.id);
+    input.setAttribute('autocomplete', 'off');
+    input.parentNode.appendChild(datalist);
+
+    let timer = null;
+    let lastQuery = '';
+
+    input.addEventListener('input', function() {
+        const query = input.value.trim();
+        clearTimeout(timer);
+        if (!query || query === lastQuery) {
+            return;
+        }
+
+        // 输入停顿200毫秒后再请求，避免每个按键都发起请求
+        timer = setTimeout(function() {
+            lastQuery = query;
+            fetch(url + '?q=' + encodeURIComponent(query), { credentials: 'same-origin' })
+                .then(response => response.ok ? response.json() : [])
+                .then(items => {
+                    datalist.innerHTML = '';
+                    items.forEach(item => {
+                        const option = document.createElement('option');
+                        option.value = item.id;
+                        option.label = item.id + ' ' + item.name;
+                        datalist.appendChild(option);
+                    });
+                })
+                .catch(error => console.error('候选项加载失败', error));
+        }, 200);
+    });
+}
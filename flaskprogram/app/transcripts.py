@@ -0,0 +1,140 @@
+import io
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from app import db
+from app.models import Student, Course, Score
+
+# reportlab内置的中文字体（CID字体，无需额外的字体文件）
+FONT_NAME = 'STSong-Light'
+
+# 每个工作进程一次处理的成绩单数量，减少进程间通信次数
+CHUNK_SIZE = 16
+
+# 通过网页一次下载的成绩单数量上限，更大的批量使用 flask export-transcripts 命令生成
+MAX_DOWNLOAD = 200
+
+# 文件名中允许保留的字符（字母、数字、汉字、下划线、点和连字符），其余字符替换为下划线
+_UNSAFE_FILENAME = re.compile(r'[^\w.-]')
+
+
+def _filter_students(statement, student_ids=None, major=None, class_=None):
+    """按学号、专业、班级筛选学生"""
+    if student_ids is not None:
+        statement = statement.where(Student.student_id.in_(student_ids))
+    if major:
+        statement = statement.where(Student.major == major)
+    if class_:
+        statement = statement.where(Student.class_ == class_)
+    return statement
+
+
+def count_transcripts(student_ids=None, major=None, class_=None):
+    """统计筛选条件下的学生人数（即成绩单数量），用于在生成前检查批量大小"""
+    return db.session.execute(
+        _filter_students(db.select(db.func.count()).select_from(Student), student_ids, major, class_)
+    ).scalar()
+
+
+def fetch_transcripts(student_ids=None, major=None, class_=None):
+    """一次查询取出一批学生的信息及全部成绩，返回可在进程间传递的字典列表（按学号排序）"""
+    statement = db.select(
+        Student.student_id, Student.name, Student.gender, Student.major, Student.class_,
+        Course.course_id, Course.course_name, Course.credit, Score.score
+    ).outerjoin(Score, Score.student_id == Student.student_id). \
+        outerjoin(Course, Score.course_id == Course.course_id). \
+        order_by(Student.student_id, Course.course_id)
+    statement = _filter_students(statement, student_ids, major, class_)
+
+    transcripts = []
+    for row in db.session.execute(statement):
+        if not transcripts or transcripts[-1]['student_id'] != row.student_id:
+            transcripts.append({
+                'student_id': row.student_id,
+                'name': row.name,
+                'gender': row.gender,
+                'major': row.major,
+                'class': row.class_,
+                'scores': []
+            })
+        # 外连接时没有成绩的学生，课程列为空
+        if row.course_id is not None:
+            transcripts[-1]['scores'].append((row.course_id, row.course_name, row.credit, row.score))
+    return transcripts
+
+
+def _register_font():
+    """注册中文字体（每个进程只需注册一次）"""
+    if FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(UnicodeCIDFont(FONT_NAME))
+
+
+def render_transcript(transcript):
+    """根据fetch_transcripts返回的单个学生数据生成PDF成绩单，返回PDF内容
+
+    Paragraph会解析文本中的标记，学生信息需转义（如姓名中的 < 和 &）
+    """
+    _register_font()
+    title_style = ParagraphStyle('title', fontName=FONT_NAME, fontSize=18, leading=24, alignment=1)
+    body_style = ParagraphStyle('body', fontName=FONT_NAME, fontSize=11, leading=16)
+
+    rows = [['课程ID', '课程名称', '学分', '成绩']]
+    scored = [score for _, _, _, score in transcript['scores'] if score is not None]
+    for course_id, course_name, credit, score in transcript['scores']:
+        rows.append([course_id, course_name, credit, '' if score is None else score])
+
+    table = Table(rows, colWidths=[25 * mm, 75 * mm, 25 * mm, 25 * mm])
+    table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), FONT_NAME),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f8f9fa')),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ]))
+
+    average = sum(scored) / len(scored) if scored else 0
+    story = [
+        Paragraph(f"{escape(transcript['name'])}的成绩单", title_style),
+        Spacer(1, 8 * mm),
+        Paragraph(f"学号：{escape(transcript['student_id'])}　　性别：{escape(transcript['gender'] or '')}", body_style),
+        Paragraph(f"专业：{escape(transcript['major'])}　　班级：{escape(transcript['class'] or '')}", body_style),
+        Spacer(1, 6 * mm),
+        table,
+        Spacer(1, 6 * mm),
+        Paragraph(f"课程数：{len(transcript['scores'])}　　平均分：{average:.1f}", body_style),
+    ]
+
+    output = io.BytesIO()
+    document = SimpleDocTemplate(output, pagesize=A4, title=f"{transcript['student_id']} 成绩单")
+    document.build(story)
+    return output.getvalue()
+
+
+def transcript_filename(transcript):
+    """成绩单在ZIP文件中的文件名；学号、姓名中的路径分隔符等字符替换为下划线，解压时不会写到目标目录之外"""
+    return _UNSAFE_FILENAME.sub('_', f"{transcript['student_id']}_{transcript['name']}") + '.pdf'
+
+
+def write_zip(transcripts, output, workers=1):
+    """批量生成成绩单并写入ZIP文件，返回成绩单数量
+
+    workers大于1时（只用于命令行批量导出）使用多进程并行生成；网页请求中逐份生成，不为每个请求启动进程池。
+    数据已由fetch_transcripts一次性取出，工作进程只负责生成PDF，不访问数据库
+    """
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+        if workers > 1 and len(transcripts) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                pdfs = executor.map(render_transcript, transcripts, chunksize=CHUNK_SIZE)
+                for transcript, pdf in zip(transcripts, pdfs):
+                    archive.writestr(transcript_filename(transcript), pdf)
+        else:
+            for transcript in transcripts:
+                archive.writestr(transcript_filename(transcript), render_transcript(transcript))
+    return len(transcripts)
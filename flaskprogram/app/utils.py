@@ -1,112 +1,233 @@
-import random
-from faker import Faker
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from faker.providers.person.zh_CN import Provider as PersonProvider
 from werkzeug.security import generate_password_hash
-from app import db
+from app import db, stats_cache
 from app.models import Student, Course, Score, User
 
-fake = Faker("zh_CN")
+# 基础课程（名称，学分），课程数超过时按课程类别生成其余课程
+BASE_COURSES = [
+    ("高等数学", 5),
+    ("线性代数", 4),
+    ("Python程序设计", 3),
+    ("数据结构", 4),
+    ("数据库原理", 3),
+    ("计算机网络", 4),
+    ("机器学习", 3),
+    ("Web开发", 3)
+]
+COURSE_TOPICS = ["程序设计", "算法分析", "操作系统", "编译原理", "软件测试", "信息安全", "数据挖掘", "计算机视觉",
+                 "自然语言处理", "分布式系统", "云计算", "嵌入式系统", "概率统计", "离散数学", "数值分析"]
 
-'''
-def generate_mock_data(student_count=100, course_count=8):
-    """生成模拟数据"""
-    # 清空现有数据
-    db.session.query(Score).delete()
-    db.session.query(Student).delete()
-    db.session.query(Course).delete()
-    db.session.query(User).delete()
-    db.session.commit()
+# 专业及人数权重（模拟各专业规模不均）
+MAJORS = {"计算机科学": 0.3, "软件工程": 0.25, "数据科学": 0.2, "人工智能": 0.15, "网络安全": 0.1}
+
+# 生源地，人数按名次近似Zipf分布
+HOMETOWNS = ["北京", "上海", "广州", "深圳", "杭州", "武汉", "成都", "重庆", "南京", "西安",
+             "长沙", "郑州", "济南", "合肥", "福州", "南昌", "沈阳", "哈尔滨", "昆明", "贵阳",
+             "南宁", "太原", "石家庄", "兰州", "乌鲁木齐", "呼和浩特", "银川", "西宁", "拉萨", "海口"]
+
+# 每名学生选修的课程数范围
+MIN_COURSES = 5
+MAX_COURSES = 12
+
+# 每批写入的行数
+BATCH_SIZE = 20000
+
+
+def _zipf_weights(count, exponent=1.0):
+    """按名次生成归一化的Zipf权重"""
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _course_rows(course_count, rng):
+    """生成课程行 (课程ID, 课程名称, 学分)，学分集中在3~4分"""
+    rows = []
+    for i in range(course_count):
+        if i < len(BASE_COURSES):
+            name, credit = BASE_COURSES[i]
+        else:
+            topic = COURSE_TOPICS[(i - len(BASE_COURSES)) % len(COURSE_TOPICS)]
+            name = f"{topic}{(i - len(BASE_COURSES)) // len(COURSE_TOPICS) + 1}"
+            credit = int(rng.choice([1, 2, 3, 4, 5], p=[0.05, 0.2, 0.4, 0.3, 0.05]))
+        rows.append((i + 1, name, credit))
+    return rows
 
-    # 创建课程
-    courses = [
-        ("高等数学", 5),
-        ("线性代数", 4),
-        ("Python程序设计", 3),
-        ("数据结构", 4),
-        ("数据库原理", 3),
-        ("计算机网络", 4),
-        ("机器学习", 3),
-        ("Web开发", 3)
-    ]
 
-    course_objects = []
-    for i, (name, credit) in enumerate(courses):
-        course = Course(course_id=i + 1, course_name=name, credit=credit)
-        course_objects.append(course)
-        db.session.add(course)
-
-    # 创建专业和生源地列表
-    majors = [
-        "数据科学",
-        "计算机科学",
-        "软件工程",
-        "人工智能",
-        "网络安全"
+def _student_chunk(params, start, count, seed):
+    """在工作进程中生成一批学生及其成绩（只生成数据，不访问数据库）
+
+    每批使用独立的随机种子，结果与进程数无关，可重复生成
+    """
+    rng = np.random.default_rng(seed)
+    course_count = len(params['difficulty'])
+
+    # 学生基本信息：性别、专业、生源地按权重抽样，姓名由常见姓氏和名字组合
+    genders = rng.random(count) < 0.55
+    majors = rng.choice(len(params['majors']), size=count, p=params['major_weights'])
+    hometowns = rng.choice(len(HOMETOWNS), size=count, p=params['hometown_weights'])
+    surnames = rng.choice(len(params['surnames']), size=count, p=params['surname_weights'])
+    male_names = rng.integers(0, len(params['male_names']), size=count)
+    female_names = rng.integers(0, len(params['female_names']), size=count)
+    classes = rng.integers(1, 6, size=count)
+
+    students = []
+    for i in range(count):
+        major = params['majors'][majors[i]]
+        given = params['male_names'][male_names[i]] if genders[i] else params['female_names'][female_names[i]]
+        students.append((
+            f"{params['prefix']}{start + i + 1:07d}",
+            params['surnames'][surnames[i]] + given,
+            "男" if genders[i] else "女",
+            major,
+            f"{major}{classes[i]}班",
+            HOMETOWNS[hometowns[i]],
+            "123456"
+        ))
+
+    # 选课：按课程热度加权不放回抽样（Gumbel-top-k），每名学生选修的课程数不同
+    take = min(MAX_COURSES, course_count)
+    keys = np.log(params['course_weights']) + rng.gumbel(size=(count, course_count))
+    chosen = np.argpartition(-keys, take - 1, axis=1)[:, :take]
+    counts = rng.integers(min(MIN_COURSES, take), take + 1, size=count)
+    mask = np.arange(take) < counts[:, None]
+
+    # 成绩 = 课程难度 + 学生能力 + 随机波动，截断到0~100分
+    ability = rng.normal(0, 8, size=count)
+    scores = params['difficulty'][chosen] + ability[:, None] + rng.normal(0, 6, size=chosen.shape)
+    scores = np.round(np.clip(scores, 0, 100), 1)
+
+    rows, columns = np.nonzero(mask)
+    score_rows = [
+        (students[row][0], int(chosen[row, column]) + 1, float(scores[row, column]))
+        for row, column in zip(rows.tolist(), columns.tolist())
     ]
-    hometowns = ["北京", "上海", "广州", "深圳", "杭州", "武汉", "成都", "重庆", "南京", "西安"]
-
-    # 创建学生
-    student_objects = []
-    for i in range(student_count):
-        student_id = f"230161{i + 1:04d}"
-        student = Student(
-            student_id=student_id,
-            name=fake.name(),
-            gender=random.choice(["男", "女"]),
-            major=random.choice(majors),
-            class_=f"{random.choice(majors)[0:2]}{random.randint(21, 23)}{i % 5 + 1:02d}",
-            hometown=random.choice(hometowns),
-            password="123456"
-        )
-        student_objects.append(student)
-        db.session.add(student)
-
-    # 为每个学生创建成绩
-    for student in student_objects:
-        # 随机选择5-8门课程
-        selected_courses = random.sample(course_objects, k=random.randint(5, 8))
-        for course in selected_courses:
-            score = Score(
-                student_id=student.student_id,
-                course_id=course.course_id,
-                score=round(random.uniform(50, 100), 1)
-            )
-            db.session.add(score)
-
-    # 添加自定义学生
-    my_student = Student(
-        student_id="2301610230",
-        name="虞桓毅",
-        gender="男",
-        major="数据科学与大数据技术",
-        class_="23016102",
-        hometown="黄石",
-        password="123456"
-    )
-    db.session.add(my_student)
-
-    # 为自定义学生添加所有课程成绩
-    for course in course_objects:
-        my_score = Score(
-            student_id="2301610230",
-            course_id=course.course_id,
-            score=85.0
-        )
-        db.session.add(my_score)
-
-    # 添加管理员用户 - 使用密码哈希
-    admin_user = User(
-        username="admin",
-        password=generate_password_hash("admin123")
-    )
-    db.session.add(admin_user)
-
-    # 添加测试用户
-    test_user = User(
-        username="test",
-        password=generate_password_hash("test123")
-    )
-    db.session.add(test_user)
+    return students, score_rows
+
+
+def _ensure_users():
+    """确保存在管理员和测试用户（admin/admin123、test/test123），便于压测登录"""
+    for username, password in (("admin", "admin123"), ("test", "test123")):
+        if not User.query.filter_by(username=username).first():
+            db.session.add(User(username=username, password=generate_password_hash(password)))
+    db.session.commit()
+
 
+def _drop_secondary_objects():
+    """删除成绩、学生、课程表上的普通索引和触发器，批量写入结束后再统一重建"""
+    tables = [Student.__table__, Course.__table__, Score.__table__]
+    for table in tables:
+        for index in table.indexes:
+            if not index.unique:
+                index.drop(bind=db.engine, checkfirst=True)
+    triggers = db.session.execute(db.text(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name IN ('student', 'course', 'score')"
+    )).scalars().all()
+    for name in triggers:
+        db.session.execute(db.text(f'DROP TRIGGER "{name}"'))
     db.session.commit()
-    print(f"模拟数据生成完成：学生{student_count + 1}名，课程{course_count}门")
-'''
+
+
+def _rebuild_secondary_objects():
+    """重建索引、触发器、成绩分段计数、分箱计数和学生全文索引，并使统计缓存失效"""
+    from app import counters, search
+
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+    counters.install_triggers()
+    search.install_index()
+    db.session.execute(db.text("ANALYZE"))
+    db.session.commit()
+    stats_cache.invalidate()
+
+
+def generate_mock_data(student_count=100, course_count=8, seed=0, workers=1, clear=False,
+                       prefix="G", progress=None):
+    """生成可重复的模拟数据：学生、课程及成绩，用于压测
+
+    - 专业、生源地、选课热度按权重抽样，成绩由课程难度、学生能力和随机波动合成
+    - 数据由workers个进程分批生成，主进程以executemany分批写入（SQLite只允许单个写入者）
+    - 写入期间暂时删除普通索引和触发器并关闭同步写盘，结束后统一重建
+    - progress 为回调函数，每写入一批学生后以 (已写入学生数, 已写入成绩数) 调用
+    - 返回实际写入的 (学生数, 课程数, 成绩数)；学号、课程ID或（学号，课程ID）已存在的记录被跳过，不计入
+    """
+    rng = np.random.default_rng(seed)
+    surnames = list(PersonProvider.last_names)
+    surname_weights = np.array(list(PersonProvider.last_names.values()))
+    params = {
+        'prefix': prefix,
+        'majors': list(MAJORS),
+        'major_weights': np.array(list(MAJORS.values())),
+        'hometown_weights': _zipf_weights(len(HOMETOWNS), 0.8),
+        'surnames': surnames,
+        'surname_weights': surname_weights / surname_weights.sum(),
+        'male_names': PersonProvider.first_names_male,
+        'female_names': PersonProvider.first_names_female,
+        # 选课热度按课程编号近似Zipf分布（基础课选修人数多），课程平均分在75分左右
+        'course_weights': _zipf_weights(course_count, 0.6),
+        'difficulty': rng.normal(75, 6, size=course_count),
+    }
+
+    _drop_secondary_objects()
+    if clear:
+        for model in (Score, Student, Course):
+            db.session.execute(db.delete(model))
+        db.session.commit()
+    _ensure_users()
+
+    # 使用单独的连接写入，便于在结束时恢复该连接的同步写盘设置
+    connection = db.engine.connect()
+    synchronous = connection.exec_driver_sql("PRAGMA synchronous").scalar()
+    connection.exec_driver_sql("PRAGMA synchronous = OFF")
+    totals = [0, 0]
+    try:
+        courses = connection.exec_driver_sql(
+            "INSERT OR IGNORE INTO course (course_id, course_name, credit) VALUES (?, ?, ?)",
+            _course_rows(course_count, rng)
+        ).rowcount
+        connection.commit()
+
+        # 每批学生使用由主种子派生的独立种子
+        starts = list(range(0, student_count, BATCH_SIZE))
+        seeds = np.random.SeedSequence(seed).spawn(len(starts))
+        sizes = [min(BATCH_SIZE, student_count - start) for start in starts]
+        args = ([params] * len(starts), starts, sizes, seeds)
+
+        if workers > 1:
+            executor = ProcessPoolExecutor(max_workers=workers)
+            chunks = executor.map(_student_chunk, *args)
+        else:
+            executor = None
+            chunks = map(_student_chunk, *args)
+
+        try:
+            for students, scores in chunks:
+                # executemany的rowcount为实际写入的行数，被 OR IGNORE 跳过的行不计入
+                totals[0] += connection.exec_driver_sql(
+                    "INSERT OR IGNORE INTO student (student_id, name, gender, major, class, hometown, password) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", students
+                ).rowcount
+                totals[1] += connection.exec_driver_sql(
+                    "INSERT OR IGNORE INTO score (student_id, course_id, score) VALUES (?, ?, ?)", scores
+                ).rowcount
+                connection.commit()
+                if progress is not None:
+                    progress(*totals)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+    finally:
+        connection.rollback()
+        connection.exec_driver_sql(f"PRAGMA synchronous = {int(synchronous)}")
+        connection.close()
+        _rebuild_secondary_objects()
+
+    return totals[0], courses, totals[1]
+
+
+def default_workers():
+    """默认的数据生成进程数：CPU核数减一（主进程负责写入）"""
+    return max(1, (os.cpu_count() or 1) - 1)
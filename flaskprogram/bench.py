@@ -0,0 +1,488 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from sqlalchemy import event
+
+# 压测数据规模（成绩条数）
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+# 压测数据的课程数及随机种子；每名学生平均选修约8.5门课程
+COURSE_COUNT = 50
+AVERAGE_COURSES = 8.5
+SEED = 20240601
+
+# 压测使用的学号前缀（student_scores路由的学号参数为整数）
+STUDENT_PREFIX = '9'
+
+# 压测登录用户
+BENCH_USER = ('bench', 'bench123')
+
+# 被测路由：(名称, 端点, URL参数)；参数中的 {student_id}、{course_id} 在运行时替换为样本数据
+ROUTES = [
+    ('home', 'main.home', {}),
+    ('student_list', 'main.student_list', {}),
+    ('student_list_search', 'main.student_list', {'search': '计算机'}),
+    ('student_add_form', 'main.student_add', {}),
+    ('student_edit_form', 'main.student_edit', {'student_id': '{student_id}'}),
+    ('student_scores', 'main.student_scores', {'student_id': '{student_id}'}),
+    ('student_transcript', 'main.student_transcript', {'student_id': '{student_id}'}),
+    ('course_list', 'main.course_list', {}),
+    ('course_list_search', 'main.course_list', {'search': 'credit>=3'}),
+    ('course_add_form', 'main.course_add', {}),
+    ('course_edit_form', 'main.course_edit', {'course_id': '{course_id}'}),
+    ('score_input_form', 'main.score_input', {}),
+    ('score_batch_form', 'main.score_batch_input', {}),
+    ('import_form', 'main.data_import', {}),
+    ('score_query', 'main.score_query', {}),
+    ('score_query_student', 'main.score_query', {'student_id': '{student_id}'}),
+    ('score_query_course', 'main.score_query', {'course_id': '{course_id}'}),
+    ('score_export_csv_student', 'main.score_export_csv', {'student_id': '{student_id}'}),
+    ('score_export_xlsx_student', 'main.score_export_xlsx', {'student_id': '{student_id}'}),
+    ('student_suggest', 'main.student_suggest', {'q': STUDENT_PREFIX + '00001'}),
+    ('course_suggest', 'main.course_suggest', {'q': '数据'}),
+    ('visualization', 'main.visualization', {}),
+] + [
+    (f'stats_{chart}', 'main.stats_api', {'chart': chart})
+    for chart in ('distribution', 'course_distribution', 'major_averages',
+                  'course_averages', 'course_boxplot', 'hometowns')
+]
+
+# 并发压测比较的数据库配置：SQLite默认设置（回滚日志，写事务提交时阻塞读取）与生产环境配置（config.py / app/pragmas.py）
+PROFILES = {
+    'default': {'SQLITE_PRAGMAS': {'journal_mode': 'DELETE', 'synchronous': 'FULL'}},
+    'production': {},
+}
+
+# 并发压测中读取进程轮流请求的路由，及写入进程每次批量录入的成绩数
+CONCURRENT_READS = [
+    ('main.score_query', {'course_id': '{course_id}'}),
+    ('main.stats_api', {'chart': 'course_averages'}),
+    ('main.student_list', {}),
+]
+WRITE_BATCH = 50
+
+# 逐条录入与批量录入对比时写入的成绩行数
+ENTRY_ROWS = 100
+
+# 每个路由单次请求允许执行的SQL语句数（含加载登录用户的查询），超出时视为退化（多为N+1查询）
+# 使用统计缓存的路由另需一条读取数据版本号的查询
+DEFAULT_QUERY_BUDGET = 3
+QUERY_BUDGETS = {'home': 6, 'student_scores': 4, 'stats_course_distribution': 4, 'stats_course_averages': 4,
+                 'stats_course_boxplot': 4}
+
+# 不参与压测的端点：登录、注册、退出，会修改数据或导出全部数据的接口，以及性能统计页面
+SKIPPED_ENDPOINTS = {
+    'main.login', 'main.register', 'main.logout', 'main.student_delete', 'main.course_delete',
+    'main.score_batch_api', 'main.transcripts_zip', 'main.debug_metrics', 'main.prometheus_metrics', 'static',
+}
+
+
+def database_file(directory, size):
+    """压测数据库文件路径（按规模和种子区分，已存在时直接复用）"""
+    return os.path.join(directory, f'bench-{size}-{SEED}.db')
+
+
+def build_app(path, score_count, config=None):
+    """创建使用指定数据库文件的应用实例；数据库不存在时生成约score_count条成绩的可重复数据；config可覆盖其他配置"""
+    from app import create_app, db, stats_cache, utils
+    from app.models import User
+    from werkzeug.security import generate_password_hash
+
+    exists = os.path.exists(path)
+    # 压测时发现N+1查询直接报错（请求返回500），不只记录警告
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', 'TESTING': True, 'NPLUSONE_ACTION': 'raise',
+                      **(config or {})})
+    # 各规模的应用共用同一个统计缓存，切换数据库时需清空（不同数据库的版本号可能相同）
+    stats_cache.clear()
+
+    with app.app_context():
+        if not exists:
+            utils.generate_mock_data(max(1, round(score_count / AVERAGE_COURSES)), COURSE_COUNT, seed=SEED,
+                                     workers=utils.default_workers(), prefix=STUDENT_PREFIX)
+        if not User.query.filter_by(username=BENCH_USER[0]).first():
+            db.session.add(User(username=BENCH_USER[0], password=generate_password_hash(BENCH_USER[1])))
+            db.session.commit()
+    return app
+
+
+def sample_ids(app):
+    """选取位于数据中间位置的学生和课程作为路由参数"""
+    from app import db
+    with app.app_context():
+        student_count = db.session.execute(db.text("SELECT COUNT(*) FROM student")).scalar()
+        student_id = db.session.execute(db.text(
+            "SELECT student_id FROM student ORDER BY student_id LIMIT 1 OFFSET :offset"
+        ), {'offset': student_count // 2}).scalar()
+        course_id = db.session.execute(db.text("SELECT MIN(course_id) FROM course")).scalar()
+    return {'student_id': student_id, 'course_id': course_id}
+
+
+def login(app):
+    """返回已登录压测用户的测试客户端"""
+    client = app.test_client()
+    client.post('/login', data={'username': BENCH_USER[0], 'password': BENCH_USER[1]})
+    return client
+
+
+class QueryCounter:
+    """统计请求期间执行的SQL语句数量（含读写分离的只读连接）"""
+
+    def __init__(self, engines):
+        self.count = 0
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def measure(client, counter, url, repeat):
+    """多次请求同一URL，返回首次及各分位的耗时、每次请求的SQL语句数和峰值内存"""
+    timings = []
+    queries = []
+    status = None
+    for _ in range(repeat):
+        counter.count = 0
+        start = time.perf_counter()
+        response = client.get(url)
+        response.get_data()  # 流式响应需读取完整内容
+        timings.append((time.perf_counter() - start) * 1000)
+        queries.append(counter.count)
+        status = response.status_code
+        response.close()
+
+    # 单独请求一次测量峰值内存（tracemalloc会拖慢请求，不计入耗时）
+    tracemalloc.start()
+    response = client.get(url)
+    response.get_data()
+    response.close()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'url': url,
+        'status': status,
+        'first_ms': round(timings[0], 3),
+        'p50_ms': round(float(np.percentile(timings, 50)), 3),
+        'p95_ms': round(float(np.percentile(timings, 95)), 3),
+        'queries': max(queries),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def instrumentation_overhead(iterations=100_000):
+    """测量每个请求记录Prometheus指标的平均耗时（微秒）"""
+    from app import monitoring
+    from app.metrics import RequestStats
+
+    stats = RequestStats()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        monitoring.observe_request('main.bench', 'GET', 200, stats)
+    return round((time.perf_counter() - start) / iterations * 1e6, 3)
+
+
+def uncovered_endpoints(app):
+    """返回未被压测也未被明确跳过的GET端点，新增路由时提醒补充压测"""
+    covered = {endpoint for _, endpoint, _ in ROUTES} | SKIPPED_ENDPOINTS
+    return sorted(rule.endpoint for rule in app.url_map.iter_rules()
+                  if 'GET' in rule.methods and rule.endpoint not in covered)
+
+
+def run_size(path, score_count, repeat):
+    """对一个规模的数据库依次压测所有路由"""
+    from app import db
+    from flask import url_for
+
+    app = build_app(path, score_count)
+    missing = uncovered_endpoints(app)
+    if missing:
+        print(f"  警告：以下GET路由未加入压测：{', '.join(missing)}")
+    ids = sample_ids(app)
+    client = login(app)
+
+    with app.app_context():
+        counter = QueryCounter(db.engines.values())
+    results = {}
+    for name, endpoint, params in ROUTES:
+        values = {key: value.format(**ids) if isinstance(value, str) else value for key, value in params.items()}
+        with app.test_request_context():
+            url = url_for(endpoint, **values)
+        results[name] = measure(client, counter, url, repeat)
+        if results[name]['status'] != 200:
+            print(f"  {name:<28} 状态码 {results[name]['status']}")
+        print(f"  {name:<28} p50 {results[name]['p50_ms']:>9.2f} ms  p95 {results[name]['p95_ms']:>9.2f} ms  "
+              f"{results[name]['queries']:>3} 条SQL  峰值 {results[name]['peak_kb']:>9.1f} KB")
+    return results
+
+
+def _copy_database(path, name):
+    """复制压测数据库（含WAL文件中尚未写回的数据），用于会修改数据的压测，返回副本路径"""
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    connection.close()
+    copy = f'{path}.{name}.db'
+    shutil.copyfile(path, copy)
+    return copy
+
+
+def _remove_database(path):
+    """删除数据库文件及其日志文件"""
+    for name in (path, path + '-wal', path + '-shm', path + '-journal'):
+        if os.path.exists(name):
+            os.remove(name)
+
+
+def run_score_entry(path, score_count, rows=ENTRY_ROWS):
+    """对同一批已有成绩分别逐条提交 /scores/input 和一次提交 /api/scores/batch，比较总耗时（在数据库副本上运行）"""
+    from app import db
+
+    copy = _copy_database(path, 'entry')
+    try:
+        app = build_app(copy, score_count)
+        client = login(app)
+        with app.app_context():
+            pairs = db.session.execute(
+                db.text("SELECT student_id, course_id FROM score ORDER BY id LIMIT :rows"), {'rows': rows}
+            ).all()
+        rng = random.Random(SEED)
+        values = [rng.randint(40, 100) for _ in pairs]
+
+        errors = 0
+        start = time.perf_counter()
+        for (student_id, course_id), score in zip(pairs, values):
+            response = client.post('/scores/input', data={'student_id': student_id, 'course_id': course_id,
+                                                          'score': score})
+            errors += response.status_code != 302
+        single = time.perf_counter() - start
+
+        batch_rows = [{'student_id': student_id, 'course_id': course_id, 'score': 100 - score}
+                      for (student_id, course_id), score in zip(pairs, values)]
+        start = time.perf_counter()
+        response = client.post('/api/scores/batch', json={'rows': batch_rows})
+        batch = time.perf_counter() - start
+        if response.status_code != 200 or response.get_json()['errors']:
+            errors += 1
+
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
+    finally:
+        _remove_database(copy)
+
+    result = {
+        'rows': len(pairs),
+        'single_ms': round(single * 1000, 3),
+        'batch_ms': round(batch * 1000, 3),
+        'speedup': round(single / batch, 1) if batch else None,
+        'errors': errors,
+    }
+    print(f"  成绩录入 {len(pairs)} 行：逐条提交 {result['single_ms']:.1f} ms，批量提交 {result['batch_ms']:.1f} ms"
+          f"（{result['speedup']} 倍），错误 {errors}")
+    return result
+
+
+def _read_loop(client, urls, deadline):
+    """读取进程：轮流请求各路由直到截止时间，返回 (每次请求的耗时（毫秒）, 错误列表)"""
+    timings, errors = [], []
+    index = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = client.get(urls[index % len(urls)])
+            response.get_data()
+            status = response.status_code
+        except Exception as e:
+            status = type(e).__name__
+        if status == 200:
+            timings.append((time.perf_counter() - start) * 1000)
+        else:
+            errors.append(status)
+        index += 1
+    return timings, errors
+
+
+def _write_loop(client, pairs, deadline, seed):
+    """写入进程：不断批量更新已有成绩直到截止时间（每批在一个事务中提交），返回 (每批写入的行数, 错误列表)"""
+    rng = random.Random(seed)
+    counts, errors = [], []
+    while time.perf_counter() < deadline:
+        rows = [{'student_id': student_id, 'course_id': course_id, 'score': rng.randint(40, 100)}
+                for student_id, course_id in rng.sample(pairs, min(WRITE_BATCH, len(pairs)))]
+        try:
+            status = client.post('/api/scores/batch', json={'rows': rows}).status_code
+        except Exception as e:
+            status = type(e).__name__
+        if status == 200:
+            counts.append(len(rows))
+        else:
+            errors.append(status)
+    return counts, errors
+
+
+def _concurrency_worker(path, score_count, config, role, targets, seconds, barrier, seed):
+    """并发压测的工作进程（与多进程部署相同，每个进程使用自己的应用实例和连接池），所有进程就绪后同时开始"""
+    app = build_app(path, score_count, config)
+    client = login(app)
+    barrier.wait()
+    deadline = time.perf_counter() + seconds
+    if role == 'reader':
+        return role, _read_loop(client, targets, deadline)
+    return role, _write_loop(client, targets, deadline, seed)
+
+
+def run_concurrency(path, score_count, seconds, readers, writers):
+    """在写入进行时测量读取吞吐量，分别使用各数据库配置（在数据库副本上运行，不修改压测数据库）"""
+    from app import db
+    from flask import url_for
+
+    results = {}
+    for profile, config in PROFILES.items():
+        copy = _copy_database(path, profile)
+        app = build_app(copy, score_count, config)
+        ids = sample_ids(app)
+        with app.app_context():
+            pairs = [tuple(row) for row in db.session.execute(
+                db.text("SELECT student_id, course_id FROM score LIMIT 5000"))]
+            for engine in db.engines.values():
+                engine.dispose()
+        with app.test_request_context():
+            urls = [url_for(endpoint, **{key: value.format(**ids) for key, value in params.items()})
+                    for endpoint, params in CONCURRENT_READS]
+
+        timings, counts, errors = [], [], []
+        with multiprocessing.Manager() as manager, \
+                ProcessPoolExecutor(max_workers=readers + writers) as executor:
+            barrier = manager.Barrier(readers + writers)
+            futures = [executor.submit(_concurrency_worker, copy, score_count, config, 'reader', urls,
+                                       seconds, barrier, None) for _ in range(readers)]
+            futures += [executor.submit(_concurrency_worker, copy, score_count, config, 'writer', pairs,
+                                        seconds, barrier, SEED + index) for index in range(writers)]
+            for future in futures:
+                role, (values, failures) = future.result()
+                (timings if role == 'reader' else counts).extend(values)
+                errors.extend(failures)
+
+        _remove_database(copy)
+
+        results[profile] = {
+            'reads_per_s': round(len(timings) / seconds, 1),
+            'read_p50_ms': round(float(np.percentile(timings, 50)), 3) if timings else None,
+            'read_p95_ms': round(float(np.percentile(timings, 95)), 3) if timings else None,
+            'write_batches_per_s': round(len(counts) / seconds, 1),
+            'rows_written_per_s': round(sum(counts) / seconds, 1),
+            'errors': len(errors),
+        }
+        print(f"  并发 {profile:<12} 读取 {results[profile]['reads_per_s']:>8.1f} 次/秒  "
+              f"p95 {results[profile]['read_p95_ms'] or 0:>9.2f} ms  "
+              f"写入 {results[profile]['rows_written_per_s']:>8.1f} 行/秒  错误 {len(errors)}")
+    return results
+
+
+def compare(report, baseline, threshold, min_delta_ms):
+    """与基准报告比较，返回退化项列表：状态码变化、p95耗时超过基准的(1+threshold)倍（且差值超过min_delta_ms），或SQL语句数增加"""
+    regressions = []
+    for size, routes in report['results'].items():
+        for name, current in routes.items():
+            previous = baseline.get('results', {}).get(size, {}).get(name)
+            if previous is None:
+                continue
+            if current['status'] != previous['status']:
+                regressions.append(f"{size} {name}: 状态码 {previous['status']} -> {current['status']}")
+            delta = current['p95_ms'] - previous['p95_ms']
+            if current['p95_ms'] > previous['p95_ms'] * (1 + threshold) and delta > min_delta_ms:
+                regressions.append(f"{size} {name}: p95 {previous['p95_ms']:.2f} -> {current['p95_ms']:.2f} ms")
+            if current['queries'] > previous['queries']:
+                regressions.append(f"{size} {name}: SQL语句数 {previous['queries']} -> {current['queries']}")
+    return regressions
+
+
+def budget_violations(report):
+    """返回SQL语句数超出预算的路由"""
+    violations = []
+    for size, routes in report['results'].items():
+        for name, current in routes.items():
+            budget = QUERY_BUDGETS.get(name, DEFAULT_QUERY_BUDGET)
+            if current['queries'] > budget:
+                violations.append(f"{size} {name}: {current['queries']} 条SQL，预算 {budget} 条")
+    return violations
+
+
+def main(argv=None):
+    """主函数：生成（或复用）各规模的压测数据库，压测所有路由，写出JSON报告并与基准比较"""
+    parser = argparse.ArgumentParser(description="对 main 蓝图的各个路由进行压测")
+    parser.add_argument('--sizes', default='10k,100k', help=f"压测数据规模，可选 {','.join(SIZES)}")
+    parser.add_argument('--repeat', type=int, default=20, help="每个路由的请求次数")
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'flaskprogram-bench'),
+                        help="压测数据库的存放目录（生成后复用）")
+    parser.add_argument('--output', default='bench-report.json', help="JSON报告的输出路径")
+    parser.add_argument('--baseline', help="基准报告路径，指定时与之比较，出现退化则以非零状态退出（超出SQL语句数预算时同样以非零状态退出）")
+    parser.add_argument('--threshold', type=float, default=0.25, help="p95耗时允许的增幅（0.25表示25%%）")
+    parser.add_argument('--concurrency', type=float, default=0, metavar='SECONDS',
+                        help="大于0时，在写入进行时测量读取吞吐量（每种数据库配置运行的秒数）")
+    parser.add_argument('--readers', type=int, default=4, help="并发压测的读取进程数")
+    parser.add_argument('--writers', type=int, default=1, help="并发压测的写入进程数")
+    parser.add_argument('--min-delta-ms', type=float, default=5.0, help="p95耗时差值小于该值时不视为退化")
+    args = parser.parse_args(argv)
+
+    sizes = [size.strip().lower() for size in args.sizes.split(',') if size.strip()]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"未知的数据规模：{', '.join(unknown)}")
+    os.makedirs(args.data_dir, exist_ok=True)
+
+    report = {
+        'meta': {
+            'seed': SEED,
+            'repeat': args.repeat,
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        },
+        'results': {},
+        'score_entry': {},
+        'concurrency': {},
+    }
+    report['meta']['metrics_overhead_us'] = instrumentation_overhead()
+    print(f"每个请求记录Prometheus指标耗时 {report['meta']['metrics_overhead_us']} µs")
+    for size in sizes:
+        print(f"数据规模 {size}（约 {SIZES[size]} 条成绩）")
+        report['results'][size] = run_size(database_file(args.data_dir, size), SIZES[size], args.repeat)
+        report['score_entry'][size] = run_score_entry(database_file(args.data_dir, size), SIZES[size])
+        if args.concurrency > 0:
+            report['concurrency'][size] = run_concurrency(database_file(args.data_dir, size), SIZES[size],
+                                                          args.concurrency, args.readers, args.writers)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+    print(f"报告已写入 {args.output}")
+
+    violations = budget_violations(report)
+    for violation in violations:
+        print(f"超出SQL语句数预算：{violation}")
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold, args.min_delta_ms)
+        for regression in regressions:
+            print(f"退化：{regression}")
+        if not regressions:
+            print("与基准相比没有退化")
+    return 1 if violations or regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
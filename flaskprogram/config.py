@@ -7,4 +7,24 @@ DEBUG = True
 # 数据库配置
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(BASE_DIR, 'xxq.db')}"
-SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# 数据库连接池：常驻连接数、高峰时可额外创建的连接数及等待空闲连接的超时（秒）
+# 只用于数据库文件或数据库服务器；内存数据库使用单连接的StaticPool，不接受这些参数
+SQLALCHEMY_POOL_OPTIONS = {'pool_size': 10, 'max_overflow': 20, 'pool_timeout': 30}
+
+# 每个新建的SQLite连接执行的PRAGMA，未设置时使用 app/pragmas.py 中的生产环境配置（WAL日志、synchronous=NORMAL等），
+# 设为空字典时使用SQLite默认设置
+# SQLITE_PRAGMAS = {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 5000}
+
+# 读写分离：GET请求使用只读连接（默认以mode=ro只读方式打开同一数据库文件，也可指定只读副本），写入使用主连接
+READ_ONLY_ROUTING = True
+# SQLALCHEMY_READ_DATABASE_URI = 'sqlite:///file:/path/to/replica.db?mode=ro&uri=true'
+
+# N+1查询检测：同一关系在一个请求中懒加载超过阈值次数时的处理方式（warn、raise或ignore）
+NPLUSONE_THRESHOLD = 5
+NPLUSONE_ACTION = 'warn'
+
+# 慢查询日志：请求中执行时间超过阈值（毫秒）的SQL语句写入该文件（按大小轮转），设为None时不记录
+SLOW_QUERY_MS = 100
+SLOW_QUERY_LOG = os.path.join(BASE_DIR, 'slow-queries.jsonl')
\ No newline at end of file
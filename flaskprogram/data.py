@@ -1,9 +1,12 @@
+import argparse
 import sqlite3
+import sys
+from contextlib import nullcontext
+from itertools import islice
+from sqlalchemy.engine import make_url
+import derived_tables
 
-# 数据库文件路径
-DB_PATH = r"E:\SQL\sqlite\sqlite-dll-win-x64-3500100\xxq.db"
-
-# 假设数据直接在代码中（实际使用时可替换为文件读取）
+# 内置的示例数据（未指定数据文件时导入）；数据文件格式与此相同
 STUDENT_DATA = """
 | 20230001   | 学生1   | 男     | 软件工程   | 软件工程4班   | 上海     | 123456   |
 | 20230002   | 学生2   | 女     | 网络安全   | 网络安全5班   | 成都     | 123456   |
@@ -919,10 +922,38 @@ STUDENT_DATA2 ="""
 | 800 | 20230100   |         1 |  84.00 |
 """
 
-def connect_database():
-    """连接到SQLite数据库"""
-    conn = sqlite3.connect(DB_PATH)
+# 学生、课程、成绩表导出数据的字段（与表格中各列的顺序一致）
+TABLES = {
+    'student': ('student_id', 'name', 'gender', 'major', 'class', 'hometown', 'password'),
+    'course': ('course_id', 'course_name', 'credit'),
+    'score': ('id', 'student_id', 'course_id', 'score'),
+}
+
+# 外键列 -> (被引用的表, 列)；INSERT OR IGNORE 不会跳过违反外键约束的记录（整批写入失败），需在写入前过滤
+FOREIGN_KEYS = {
+    'score': {'student_id': ('student', 'student_id'), 'course_id': ('course', 'course_id')},
+}
+
+# 每批写入的行数
+BATCH_SIZE = 5000
+
+def database_path(uri=None):
+    """从 config.SQLALCHEMY_DATABASE_URI 中取出SQLite数据库文件路径"""
+    if uri is None:
+        import config
+        uri = config.SQLALCHEMY_DATABASE_URI
+    url = make_url(uri)
+    if url.get_backend_name() != 'sqlite' or not url.database:
+        raise ValueError(f"仅支持SQLite数据库文件：{uri}")
+    return url.database
+
+def connect_database(path=None):
+    """连接到SQLite数据库，并调整为适合批量导入的设置（仅对本连接有效）"""
+    conn = sqlite3.connect(path or database_path())
     conn.execute("PRAGMA foreign_keys = ON")  # 启用外键约束
+    conn.execute("PRAGMA synchronous = OFF")  # 批量导入期间不等待每次提交落盘
+    conn.execute("PRAGMA temp_store = MEMORY")  # 排序、建索引的临时数据放在内存中
+    conn.execute("PRAGMA cache_size = -65536")  # 页缓存64MB
     return conn, conn.cursor()
 
 def close_database(conn, cursor):
@@ -930,124 +961,186 @@ def close_database(conn, cursor):
     cursor.close()
     conn.close()
 
-#学生数据解析
-'''
-def parse_student_data(data):
-    """解析学生数据"""
-    students = []
-    for line in data.split('\n'):
-        if '|' in line and '+' not in line:
-            parts = [p.strip() for p in line.strip('|').split('|') if p.strip()]
-            if len(parts) >= 7:
-                students.append((
-                    parts[0],       # student_id
-                    parts[1],       # name
-                    parts[2],       # gender
-                    parts[3],       # major
-                    parts[4],       # class
-                    parts[5],       # hometown
-                    parts[6]        # password
-                ))
-    return students
-'''
-#课表数据解析
-'''
-def parse_course_data(data):
-    """解析课程数据"""
-    courses = []
-    for line in data.split('\n'):
-        if '|' in line and '+' not in line:
-            parts = [p.strip() for p in line.strip('|').split('|') if p.strip()]
-            if len(parts) >= 3:
-                courses.append((
-                    parts[0],  # course_id
-                    parts[1],  # course_name
-                    parts[2]   # credit
-                ))
-    return courses
-'''
+def iter_table_rows(lines, columns):
+    """逐行解析MySQL风格的表格文本（| a | b |），跳过边框和表头，逐条返回字段元组"""
+    for line in lines:
+        if '|' not in line or line.lstrip().startswith('+'):
+            continue
+        parts = [p.strip() for p in line.strip().strip('|').split('|')]
+        if len(parts) < len(columns) or parts[0] == columns[0]:
+            continue
+        # 导出数据中的NULL表示空值
+        yield tuple(None if part == 'NULL' else part for part in parts[:len(columns)])
 
-def parse_score_data(data):
-    """解析成绩数据"""
-    scores = []
-    for line in data.split('\n'):
-        if '|' in line and '+' not in line:
-            parts = [p.strip() for p in line.strip('|').split('|') if p.strip()]
-            if len(parts) >= 4:
-                scores.append((
-                    parts[0],  # score_id
-                    parts[1],  # student_id
-                    parts[2],  # course_id
-                    parts[3]   # score
-                ))
-    return scores
+def parse_student_data(lines):
+    """解析学生数据：学号、姓名、性别、专业、班级、生源地、密码"""
+    return iter_table_rows(lines, TABLES['student'])
 
-#学生数据插入
-'''
-def insert_students_to_database(students):
-    """将学生数据插入到数据库"""
-    conn, cursor = connect_database()
-    try:
-        cursor.executemany(
-            "INSERT INTO student (student_id, name, gender, major, class, hometown, password) VALUES (?, ?, ?, ?, ?, ?, ?)",
-            students
-        )
-        conn.commit()
-        print(f"成功插入 {len(students)} 条学生记录")
-    except sqlite3.Error as e:
-        print(f"插入学生数据时出错: {e}")
-        conn.rollback()
-    finally:
-        close_database(conn, cursor)
-'''
-#课表信息插入
-'''
-def insert_courses_to_database(courses):
-    """将课程数据插入到数据库"""
-    conn, cursor = connect_database()
+def parse_course_data(lines):
+    """解析课程数据：课程ID、课程名称、学分"""
+    return iter_table_rows(lines, TABLES['course'])
+
+def parse_score_data(lines):
+    """解析成绩数据：成绩ID、学号、课程ID、成绩"""
+    return iter_table_rows(lines, TABLES['score'])
+
+PARSERS = {
+    'student': parse_student_data,
+    'course': parse_course_data,
+    'score': parse_score_data,
+}
+
+def batched(rows, size):
+    """将行迭代器切分为固定大小的批次"""
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+def drop_secondary_objects(conn, tables):
+    """删除表上的普通索引和触发器，返回 (建索引语句, 建触发器语句) 以便导入后重建
+
+    唯一索引保留（用于去重）；触发器维护的计数表和全文索引在导入后由 rebuild_derived_tables 重建
+    """
+    placeholders = ", ".join("?" * len(tables))
+    indexes = conn.execute(
+        f"SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name IN ({placeholders}) "
+        "AND sql IS NOT NULL AND sql NOT LIKE 'CREATE UNIQUE%'", tables
+    ).fetchall()
+    triggers = conn.execute(
+        f"SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name IN ({placeholders})", tables
+    ).fetchall()
+
+    for name, _ in indexes:
+        conn.execute(f'DROP INDEX "{name}"')
+    for name, _ in triggers:
+        conn.execute(f'DROP TRIGGER "{name}"')
+    conn.commit()
+    return [sql for _, sql in indexes], [sql for _, sql in triggers]
+
+def rebuild_derived_tables(conn):
+    """从成绩表和学生表重建由触发器维护的成绩分段计数、分箱计数和学生全文索引（导入期间触发器被删除，未同步维护）"""
+    tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if {'score_bucket_counts', 'score_bin_counts'} <= tables:
+        # 分段、分箱规则与应用中的触发器共用 derived_tables 中的SQL，不需要加载Flask应用
+        for sql in derived_tables.REBUILD_SQL:
+            conn.execute(sql)
+    if 'student_fts' in tables:
+        conn.execute("INSERT INTO student_fts (student_fts) VALUES ('rebuild')")
+
+def foreign_key_filter(conn, table):
+    """返回判断一行数据的外键是否都存在的函数
+
+    与 app/importer.py 一样，先读取被引用表中已有的ID集合，在内存中校验，不逐行查询数据库；
+    ID统一按字符串比较（解析出的数据均为文本），外键为空的行交由数据库的非空约束处理
+    """
+    checks = []
+    for column, (referenced, key) in FOREIGN_KEYS.get(table, {}).items():
+        known = {str(value) for (value,) in conn.execute(f"SELECT {key} FROM {referenced}")}
+        checks.append((TABLES[table].index(column), known))
+
+    def valid(row):
+        return all(row[index] is None or str(row[index]) in known for index, known in checks)
+    return valid
+
+def insert_rows(conn, table, rows, batch_size=BATCH_SIZE):
+    """按固定批次大小写入数据，每批一个事务，返回 (读取行数, 写入行数)
+
+    关联的学生或课程不存在的记录在写入前跳过；已存在（主键、唯一索引重复）或违反非空约束的记录由 INSERT OR IGNORE 跳过
+    """
+    columns = TABLES[table]
+    sql = (f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) "
+           f"VALUES ({', '.join('?' * len(columns))})")
+    valid = foreign_key_filter(conn, table)
+
+    read = inserted = 0
+    for batch in batched(rows, batch_size):
+        before = conn.total_changes
+        try:
+            conn.executemany(sql, [row for row in batch if valid(row)])
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            print(f"第 {read + 1} 至 {read + len(batch)} 行写入失败，之前的批次已提交")
+            raise
+        read += len(batch)
+        inserted += conn.total_changes - before
+    return read, inserted
+
+def bump_data_version(conn):
+    """递增应用的数据版本号，使各进程的统计缓存失效（数据库尚未由应用初始化、没有版本号表时跳过）"""
     try:
-        cursor.executemany(
-            "INSERT INTO course (course_id, course_name, credit) VALUES (?, ?, ?)",
-            courses
-        )
-        conn.commit()
-        print(f"成功插入 {len(courses)} 条课程记录")
-    except sqlite3.Error as e:
-        print(f"插入课程数据时出错: {e}")
-        conn.rollback()
-    finally:
-        close_database(conn, cursor)
-'''
+        conn.execute("UPDATE data_version SET version = version + 1")
+    except sqlite3.OperationalError:
+        pass
+
+def open_source(source):
+    """打开数据来源：'-' 表示标准输入，其他为文件路径"""
+    if source == '-':
+        return nullcontext(sys.stdin)
+    return open(source, encoding='utf-8')
+
+def load(sources, path=None, batch_size=BATCH_SIZE):
+    """依次导入学生、课程、成绩数据（外键顺序），导入完成后重建索引、触发器以及触发器维护的计数表和全文索引
 
-def insert_scores_to_database(scores):
-    """将成绩数据插入到数据库"""
-    conn, cursor = connect_database()
+    sources 为 {表名: 行迭代器或文件路径} 字典
+    """
+    conn, cursor = connect_database(path)
+    tables = [table for table in TABLES if table in sources]
+    index_sql, trigger_sql = drop_secondary_objects(conn, tables)
     try:
-        cursor.executemany(
-            "INSERT INTO score (id, student_id, course_id, score) VALUES (?, ?, ?, ?)",
-            scores
-        )
-        conn.commit()
-        print(f"成功插入 {len(scores)} 条成绩记录")
-    except sqlite3.Error as e:
-        print(f"插入成绩数据时出错: {e}")
-        conn.rollback()
+        for table in tables:
+            source = sources[table]
+            if isinstance(source, str):
+                with open_source(source) as f:
+                    read, inserted = insert_rows(conn, table, PARSERS[table](f), batch_size)
+            else:
+                read, inserted = insert_rows(conn, table, PARSERS[table](source), batch_size)
+            print(f"{table}: 读取 {read} 条记录，成功插入 {inserted} 条，"
+                  f"跳过 {read - inserted} 条（已存在、不符合约束或关联的学生、课程不存在）")
     finally:
+        # 数据导入后一次性建索引，比逐行维护索引更快
+        for sql in index_sql:
+            conn.execute(sql)
+        for sql in trigger_sql:
+            conn.execute(sql)
+        if trigger_sql:
+            rebuild_derived_tables(conn)
+        conn.execute("ANALYZE")
+        bump_data_version(conn)
+        conn.commit()
         close_database(conn, cursor)
 
-def main():
-    """主函数：解析数据并插入数据库"""
-    try:
-        #students = parse_student_data(STUDENT_DATA)
-        #insert_students_to_database(students)
+def main(argv=None):
+    """主函数：解析命令行参数并导入数据；未指定文件时导入本文件中内置的示例数据"""
+    parser = argparse.ArgumentParser(description="导入MySQL风格表格文本格式的学生、课程、成绩数据")
+    parser.add_argument('--students', metavar='FILE', help="学生数据文件，'-' 表示标准输入")
+    parser.add_argument('--courses', metavar='FILE', help="课程数据文件，'-' 表示标准输入")
+    parser.add_argument('--scores', metavar='FILE', help="成绩数据文件，'-' 表示标准输入")
+    parser.add_argument('--database', metavar='URI', help="数据库URI，默认使用 config.SQLALCHEMY_DATABASE_URI")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="每批写入的行数")
+    args = parser.parse_args(argv)
 
-        #courses = parse_course_data(STUDENT_DATA1)
-        #insert_courses_to_database(courses)
+    sources = {table: source for table, source in (
+        ('student', args.students), ('course', args.courses), ('score', args.scores)
+    ) if source}
+    if list(sources.values()).count('-') > 1:
+        parser.error("只能有一种数据从标准输入读取")
+    if not sources:
+        sources = {
+            'student': STUDENT_DATA.splitlines(),
+            'course': STUDENT_DATA1.splitlines(),
+            'score': STUDENT_DATA2.splitlines(),
+        }
 
-        scores = parse_score_data(STUDENT_DATA2)
-        insert_scores_to_database(scores)
-    except Exception as e:
+    try:
+        load(sources, database_path(args.database), args.batch_size)
+    except (OSError, ValueError, sqlite3.Error) as e:
         print(f"操作失败: {e}")
+        return 1
+    return 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
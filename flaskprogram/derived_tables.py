@@ -0,0 +1,101 @@
+# 由score表上的触发器维护的派生表（成绩分段计数、直方图分箱计数）的触发器和重建SQL
+# 只依赖标准库：应用（app.counters）和不加载Flask应用的独立导入脚本（data.py）共用同一份分段和分箱规则
+
+# 成绩分段（与可视化页面的柱状图横轴一一对应）
+BUCKETS = ['<60', '60-70', '70-80', '80-90', '90-100']
+
+# 成绩直方图的分箱：箱编号为 floor(成绩 * 10 + 0.5)，成绩范围0-100，共1001个箱
+BINS_PER_POINT = 10
+BIN_COUNT = 1001
+
+# 分段表达式（{0}为成绩列）
+BUCKET_SQL = (
+    "CASE WHEN {0} < 60 THEN '" + BUCKETS[0] + "'"
+    " WHEN {0} < 70 THEN '" + BUCKETS[1] + "'"
+    " WHEN {0} < 80 THEN '" + BUCKETS[2] + "'"
+    " WHEN {0} < 90 THEN '" + BUCKETS[3] + "'"
+    " ELSE '" + BUCKETS[4] + "' END"
+)
+
+# 分箱表达式（{0}为成绩列），与 app.sketch.score_to_bin 保持一致
+# 先截断取整再限制到 [0, BIN_COUNT - 1]：非负数的截断即floor，负数两者都归入0号箱，因此无需SQLite的数学函数
+BIN_SQL = "MIN(MAX(CAST({0} * %d + 0.5 AS INTEGER), 0), %d)" % (BINS_PER_POINT, BIN_COUNT - 1)
+
+# 将一条成绩计入分段计数
+_ADD_BUCKET_SQL = """
+    INSERT INTO score_bucket_counts (course_id, bucket, count, sum, sum_sq)
+    SELECT NEW.course_id, {bucket}, 1, NEW.score, NEW.score * NEW.score
+    WHERE NEW.score IS NOT NULL
+    ON CONFLICT (course_id, bucket) DO UPDATE SET
+        count = count + 1,
+        sum = sum + excluded.sum,
+        sum_sq = sum_sq + excluded.sum_sq;
+""".format(bucket=BUCKET_SQL.format('NEW.score'))
+
+# 将一条成绩从分段计数中扣除，计数归零的分段直接删除
+_REMOVE_BUCKET_SQL = """
+    UPDATE score_bucket_counts SET
+        count = count - 1,
+        sum = sum - OLD.score,
+        sum_sq = sum_sq - OLD.score * OLD.score
+    WHERE OLD.score IS NOT NULL
+      AND course_id = OLD.course_id
+      AND bucket = {bucket};
+    DELETE FROM score_bucket_counts
+    WHERE course_id = OLD.course_id AND count <= 0;
+""".format(bucket=BUCKET_SQL.format('OLD.score'))
+
+# 将一条成绩计入直方图分箱计数
+_ADD_BIN_SQL = """
+    INSERT INTO score_bin_counts (course_id, bin, count)
+    SELECT NEW.course_id, {bin}, 1
+    WHERE NEW.score IS NOT NULL
+    ON CONFLICT (course_id, bin) DO UPDATE SET count = count + 1;
+""".format(bin=BIN_SQL.format('NEW.score'))
+
+# 将一条成绩从直方图分箱计数中扣除，计数恰好归零的分箱直接删除（计数为负说明计数表与成绩表不一致，予以保留以便核对）
+_REMOVE_BIN_SQL = """
+    UPDATE score_bin_counts SET count = count - 1
+    WHERE OLD.score IS NOT NULL
+      AND course_id = OLD.course_id
+      AND bin = {bin};
+    DELETE FROM score_bin_counts
+    WHERE course_id = OLD.course_id AND count = 0;
+""".format(bin=BIN_SQL.format('OLD.score'))
+
+# score表上的触发器：插入、删除（包括批量删除）、修改成绩或课程时同步维护分段计数和直方图分箱计数
+TRIGGERS = {
+    'score_bucket_counts_insert': "CREATE TRIGGER IF NOT EXISTS score_bucket_counts_insert "
+                                  "AFTER INSERT ON score BEGIN" + _ADD_BUCKET_SQL + "END",
+    'score_bucket_counts_delete': "CREATE TRIGGER IF NOT EXISTS score_bucket_counts_delete "
+                                  "AFTER DELETE ON score BEGIN" + _REMOVE_BUCKET_SQL + "END",
+    'score_bucket_counts_update': "CREATE TRIGGER IF NOT EXISTS score_bucket_counts_update "
+                                  "AFTER UPDATE OF score, course_id ON score BEGIN"
+                                  + _REMOVE_BUCKET_SQL + _ADD_BUCKET_SQL + "END",
+    'score_bin_counts_insert': "CREATE TRIGGER IF NOT EXISTS score_bin_counts_insert "
+                               "AFTER INSERT ON score BEGIN" + _ADD_BIN_SQL + "END",
+    'score_bin_counts_delete': "CREATE TRIGGER IF NOT EXISTS score_bin_counts_delete "
+                               "AFTER DELETE ON score BEGIN" + _REMOVE_BIN_SQL + "END",
+    'score_bin_counts_update': "CREATE TRIGGER IF NOT EXISTS score_bin_counts_update "
+                               "AFTER UPDATE OF score, course_id ON score BEGIN" + _REMOVE_BIN_SQL + _ADD_BIN_SQL + "END",
+}
+
+# 直接扫描成绩表，按（课程，分段）计算计数、总和与平方和
+BUCKET_AGGREGATE_SQL = (
+    "SELECT course_id, {bucket} AS bucket, count(*) AS count, sum(score) AS sum, sum(score * score) AS sum_sq "
+    "FROM score WHERE score IS NOT NULL GROUP BY course_id, bucket"
+).format(bucket=BUCKET_SQL.format('score'))
+
+# 直接扫描成绩表，按（课程，分箱）计算计数
+BIN_AGGREGATE_SQL = (
+    "SELECT course_id, {bin} AS bin, count(*) AS count "
+    "FROM score WHERE score IS NOT NULL GROUP BY course_id, bin"
+).format(bin=BIN_SQL.format('score'))
+
+# 清空分段计数表、分箱计数表并从成绩表回填
+REBUILD_SQL = [
+    "DELETE FROM score_bucket_counts",
+    "INSERT INTO score_bucket_counts (course_id, bucket, count, sum, sum_sq) " + BUCKET_AGGREGATE_SQL,
+    "DELETE FROM score_bin_counts",
+    "INSERT INTO score_bin_counts (course_id, bin, count) " + BIN_AGGREGATE_SQL,
+]
@@ -0,0 +1,37 @@
+import pytest
+from werkzeug.security import generate_password_hash
+from app import create_app, db, stats_cache, utils
+from app.models import User
+
+# 测试用户
+TEST_USER = ('pytest', 'pytest123')
+
+# 模拟数据的学号前缀（student_scores等路由的学号参数为整数）
+STUDENT_PREFIX = '9'
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    """使用临时数据库文件的应用实例，生成少量可重复的模拟数据
+
+    课程数不宜过少：ANALYZE统计的表过小时，优化器会认为全表扫描比走索引更快
+    """
+    path = tmp_path_factory.mktemp('data') / 'test.db'
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', 'TESTING': True,
+                      'NPLUSONE_ACTION': 'raise', 'SLOW_QUERY_MS': None})
+    # 统计缓存为进程内共享对象，清空其他数据库留下的缓存项
+    stats_cache.clear()
+    with app.app_context():
+        utils.generate_mock_data(300, 60, seed=1, prefix=STUDENT_PREFIX)
+        db.session.add(User(username=TEST_USER[0], password=generate_password_hash(TEST_USER[1])))
+        db.session.commit()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    """已登录测试用户的测试客户端"""
+    client = app.test_client()
+    response = client.post('/login', data={'username': TEST_USER[0], 'password': TEST_USER[1]})
+    assert response.status_code == 302
+    return client
@@ -0,0 +1,40 @@
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+import data
+from app import create_app
+
+STUDENTS = ['| 80000001 | 学生甲 | 男 | 软件工程 | 软件工程1班 | 上海 | 123456 |',
+            '| 80000002 | 学生乙 | 女 | 数据科学 | 数据科学2班 | 成都 | 123456 |']
+COURSES = ['| 9001 | 测试课程 | 3 |']
+SCORES = ['| 1 | 80000001 | 9001 | 72.25 |',
+          '| 2 | 80000002 | 9001 | 88 |',
+          '| 3 | 89999999 | 9001 | 90 |',  # 学生不存在
+          '| 4 | 80000001 | 9999 | 60 |',  # 课程不存在
+          '| 5 | 80000002 | 9001 | 95 |']  # 同一学生同一课程重复
+
+
+def test_load_skips_rows_with_missing_references(tmp_path, capsys):
+    """外键不存在的成绩在写入前跳过，不会使整批写入失败；导入后重建触发器维护的计数表"""
+    path = tmp_path / 'import.db'
+    create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', 'TESTING': True, 'SLOW_QUERY_MS': None})
+
+    data.load({'student': STUDENTS, 'course': COURSES, 'score': SCORES}, str(path), batch_size=2)
+    assert 'score: 读取 5 条记录，成功插入 2 条，跳过 3 条' in capsys.readouterr().out
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT id FROM score ORDER BY id").fetchall() == [(1,), (2,)]
+    assert conn.execute("SELECT count, sum FROM score_bucket_counts WHERE course_id = 9001 ORDER BY bucket").fetchall() \
+        == [(1, 72.25), (1, 88.0)]
+    assert conn.execute("SELECT bin, count FROM score_bin_counts WHERE course_id = 9001 ORDER BY bin").fetchall() \
+        == [(723, 1), (880, 1)]
+    conn.close()
+
+
+def test_data_script_does_not_import_flask():
+    """独立导入脚本只依赖 derived_tables 中的SQL，不加载Flask应用"""
+    code = 'import sys, data; print("flask" in sys.modules, "app" in sys.modules)'
+    result = subprocess.run([sys.executable, '-c', code], cwd=Path(data.__file__).parent,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.split() == ['False', 'False']
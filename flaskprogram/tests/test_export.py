@@ -0,0 +1,40 @@
+import io
+from collections import namedtuple
+import openpyxl
+from app import export
+
+# 与成绩查询结果列相同的行
+ExportRow = namedtuple('ExportRow', 'student_id student_name course_id course_name score')
+
+# 流式导出的行数（超过若干个读取批次）
+LARGE_ROW_COUNT = 20 * export.CHUNK_SIZE + 7
+
+
+def generate_rows(count):
+    """逐行生成导出数据，不预先构造完整列表"""
+    for index in range(count):
+        yield ExportRow(f'9{index:07d}', f'学生{index}', index % 60 + 1, f'课程{index % 60}', index % 1001 / 10)
+
+
+def test_write_xlsx_streams_all_rows():
+    """逐行写入大量数据后，返回的行数与文件中的数据行数一致"""
+    output = io.BytesIO()
+    assert export.write_xlsx(generate_rows(LARGE_ROW_COUNT), output) == LARGE_ROW_COUNT
+
+    worksheet = openpyxl.load_workbook(output, read_only=True).active
+    rows = list(worksheet.iter_rows(values_only=True))
+    assert list(rows[0]) == export.EXPORT_HEADERS
+    assert len(rows) - 1 == LARGE_ROW_COUNT
+    assert rows[-1][0] == f'9{LARGE_ROW_COUNT - 1:07d}'
+
+
+def test_write_xlsx_keeps_formulas_and_urls_as_text():
+    """以=开头的姓名和网址按普通文本写入，不生成公式或超链接"""
+    rows = [ExportRow('90000001', '=HYPERLINK("http://example.com","x")', 1, 'http://example.com', 90.0)]
+    output = io.BytesIO()
+    export.write_xlsx(rows, output)
+
+    worksheet = openpyxl.load_workbook(output).active
+    name, course = worksheet.cell(2, 2), worksheet.cell(2, 4)
+    assert name.data_type == 's' and name.value == rows[0].student_name
+    assert course.hyperlink is None
@@ -0,0 +1,17 @@
+from app import create_app, db, utils
+from app.models import Course, Score, Student
+
+
+def test_totals_count_inserted_rows(tmp_path):
+    """返回实际写入的行数：以相同参数再次生成时，已存在的学生、课程和成绩全部跳过"""
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'mock.db'}", 'TESTING': True,
+                      'SLOW_QUERY_MS': None})
+    with app.app_context():
+        students, courses, scores = utils.generate_mock_data(30, 5, seed=3, prefix='7')
+        assert (students, courses) == (30, 5)
+        assert scores == db.session.execute(db.select(db.func.count()).select_from(Score)).scalar() > 0
+
+        assert utils.generate_mock_data(30, 5, seed=3, prefix='7') == (0, 0, 0)
+        assert utils.generate_mock_data(40, 5, seed=3, prefix='7')[:2] == (10, 0)
+        assert db.session.execute(db.select(db.func.count()).select_from(Student)).scalar() == 40
+        assert db.session.execute(db.select(db.func.count()).select_from(Course)).scalar() == 5
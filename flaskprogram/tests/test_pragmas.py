@@ -0,0 +1,27 @@
+import pytest
+from app import create_app, db
+from app.pragmas import is_memory_database
+
+
+@pytest.mark.parametrize('uri, expected', [
+    ('sqlite://', True),
+    ('sqlite:///:memory:', True),
+    ('sqlite:///file::memory:?uri=true', True),
+    ('sqlite:///file:shared?mode=memory&cache=shared&uri=true', True),
+    ('sqlite:////tmp/app.db', False),
+    ('postgresql://user@localhost/app', False),
+])
+def test_is_memory_database(uri, expected):
+    assert is_memory_database(uri) is expected
+
+
+def test_memory_database_uses_static_pool():
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'TESTING': True, 'SLOW_QUERY_MS': None})
+    with app.app_context():
+        assert type(db.engine.pool).__name__ == 'StaticPool'
+        assert db.session.execute(db.text('SELECT 1')).scalar() == 1
+
+
+def test_file_database_uses_pool_options(app):
+    with app.app_context():
+        assert db.engine.pool.size() == app.config['SQLALCHEMY_POOL_OPTIONS']['pool_size']
@@ -0,0 +1,37 @@
+import pytest
+from flask import url_for
+import bench
+from app.models import Student
+from app.nplusone import NPlusOneError, assert_max_queries
+
+
+@pytest.fixture(scope='module')
+def sample_ids(app):
+    """路由参数中使用的学生和课程"""
+    return bench.sample_ids(app)
+
+
+@pytest.mark.parametrize('name, endpoint, params', bench.ROUTES, ids=[route[0] for route in bench.ROUTES])
+def test_route_query_budget(app, client, sample_ids, name, endpoint, params):
+    """每个路由单次请求的SQL语句数不超过预算（与 bench.py 共用 QUERY_BUDGETS），超出时列出所有语句"""
+    values = {key: value.format(**sample_ids) if isinstance(value, str) else value for key, value in params.items()}
+    with app.test_request_context():
+        url = url_for(endpoint, **values)
+    # 先请求一次，使统计缓存等处于与压测相同的稳定状态
+    client.get(url).get_data()
+
+    with app.app_context(), assert_max_queries(bench.QUERY_BUDGETS.get(name, bench.DEFAULT_QUERY_BUDGET)):
+        response = client.get(url)
+        response.get_data()
+    assert response.status_code == 200
+
+
+def test_lazy_load_loop_raises(app):
+    """同一关系在一个请求中懒加载超过阈值次数时抛出NPlusOneError（测试配置 NPLUSONE_ACTION='raise'）"""
+    threshold = app.config['NPLUSONE_THRESHOLD']
+    with app.test_request_context('/'):
+        app.preprocess_request()
+        students = Student.query.limit(threshold + 1).all()
+        with pytest.raises(NPlusOneError, match='Student.scores'):
+            for student in students:
+                student.scores
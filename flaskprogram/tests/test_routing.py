@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy import event
+from app import create_app, db, routing
+from app.models import Course
+
+
+def count_courses():
+    """测试视图：查询课程数量"""
+    return str(db.session.execute(db.select(db.func.count()).select_from(Course)).scalar())
+
+
+def count_courses_on_primary():
+    """测试视图：先切换到主连接再查询"""
+    routing.use_primary()
+    return count_courses()
+
+
+@routing.primary
+def count_courses_primary_view():
+    """测试视图：以装饰器指定使用主连接"""
+    return count_courses()
+
+
+@routing.read_only
+def count_courses_read_only_post():
+    """测试视图：以装饰器指定使用只读连接（POST提交的查询）"""
+    return count_courses()
+
+
+def add_course():
+    """测试视图：GET请求中写入（flush使用主连接）"""
+    db.session.add(Course(course_id=990001, course_name='读写分离测试', credit=1))
+    db.session.commit()
+    return count_courses()
+
+
+@pytest.fixture
+def routed(tmp_path):
+    """使用数据库文件并开启读写分离的应用，返回 (测试客户端, 各语句使用的引擎列表)"""
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'routing.db'}", 'TESTING': True,
+                      'SLOW_QUERY_MS': None})
+    app.add_url_rule('/_routing/count', 'count', count_courses, methods=['GET', 'POST'])
+    app.add_url_rule('/_routing/primary', 'primary', count_courses_on_primary)
+    app.add_url_rule('/_routing/primary-view', 'primary_view', count_courses_primary_view)
+    app.add_url_rule('/_routing/read-only-post', 'read_only_post', count_courses_read_only_post, methods=['POST'])
+    app.add_url_rule('/_routing/add', 'add', add_course)
+
+    used = []
+    with app.app_context():
+        engines = {'primary': db.engines[None], 'read': db.engines[routing.READ_BIND]}
+    for name, engine in engines.items():
+        event.listen(engine, 'before_cursor_execute', lambda *args, name=name: used.append(name))
+    assert 'mode=ro' in str(engines['read'].url)
+    return app.test_client(), used
+
+
+@pytest.mark.parametrize('method, url, expected', [
+    ('GET', '/_routing/count', 'read'),
+    ('POST', '/_routing/count', 'primary'),
+    ('GET', '/_routing/primary', 'primary'),
+    ('GET', '/_routing/primary-view', 'primary'),
+    ('POST', '/_routing/read-only-post', 'read'),
+])
+def test_requests_use_expected_engine(routed, method, url, expected):
+    client, used = routed
+    response = client.open(url, method=method)
+    assert response.status_code == 200
+    assert used and set(used) == {expected}
+
+
+def test_writes_in_get_request_use_primary(routed):
+    """GET请求中的写入（flush）使用主连接，之后的查询仍走只读连接并能读到已提交的数据"""
+    client, used = routed
+    response = client.get('/_routing/add')
+    assert response.status_code == 200
+    assert response.text == '1'
+    assert 'primary' in used and used[-1] == 'read'
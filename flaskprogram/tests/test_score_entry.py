@@ -0,0 +1,44 @@
+import pytest
+from app import db
+from app.models import Score
+from app.score_entry import batch_upsert
+
+
+@pytest.mark.parametrize('course_id', ['²', '99999999999999999999', '-1', '1.5', 'abc'])
+def test_invalid_course_id_is_a_row_error(app, course_id):
+    with app.app_context():
+        saved, errors = batch_upsert([{'student_id': 'G000001', 'course_id': course_id, 'score': 80}])
+    assert saved == 0
+    assert errors == [{'row': 1, 'error': '课程ID必须为整数'}]
+
+
+def test_client_row_numbers_must_be_integers(app):
+    with app.app_context():
+        saved, errors = batch_upsert([
+            {'row': 'x', 'student_id': '', 'course_id': 1, 'score': 80},
+            {'row': 7, 'student_id': 'G000001', 'course_id': 1, 'score': 'abc'},
+            {'row': None, 'student_id': 0, 'course_id': 1, 'score': 80},
+        ])
+    assert saved == 0
+    assert [error['row'] for error in errors] == [1, 3, 7]
+    # 学号0不会被当作空值
+    assert errors[1]['error'] == '学生 0 不存在'
+
+
+def test_valid_rows_are_saved(app):
+    with app.app_context():
+        score = db.session.execute(db.select(Score).limit(1)).scalar_one()
+        saved, errors = batch_upsert([{'student_id': score.student_id, 'course_id': str(score.course_id), 'score': 77.5}])
+        assert (saved, errors) == (1, [])
+        db.session.refresh(score)
+        assert score.score == 77.5
+
+
+@pytest.mark.parametrize('course_id', ['²', '99999999999999999999'])
+def test_batch_api_rejects_bad_course_id_per_row(client, course_id):
+    response = client.post('/api/scores/batch', json={'rows': [{'row': 'a', 'student_id': 'x', 'course_id': course_id,
+                                                                  'score': 1}]})
+    assert response.status_code == 200
+    assert response.get_json() == {'saved': 0, 'errors': [{'row': 1, 'error': '课程ID必须为整数'}]}
+    response = client.post('/scores/batch', data={'course_id': course_id, 'rows': 'x 80'})
+    assert response.status_code == 200
@@ -0,0 +1,94 @@
+import re
+import pytest
+from app import db, search
+from app.models import Course, Student
+from app.pagination import MAX_OFFSET, OffsetPagination, encode_cursor
+
+# 查询计划中对课程表的全表扫描（走索引时为 SEARCH course USING INDEX ...）
+TABLE_SCAN = re.compile(r'^SCAN course\b')
+
+# 课程搜索框支持的各种输入：课程ID或学分、ID范围、学分范围、名称前缀及其组合
+COURSE_QUERIES = ['3', 'id=2', 'id>=2', 'id<5', 'id>2 id<=6', 'credit=3', 'credit>=4', '学分<4',
+                  '数据', 'Python', '数据 credit>=3']
+
+
+def query_plan(statement):
+    """返回语句的 EXPLAIN QUERY PLAN 各步骤描述（参数内联到语句中）"""
+    sql = str(statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+    return [row[3] for row in db.session.execute(db.text('EXPLAIN QUERY PLAN ' + sql))]
+
+
+@pytest.mark.parametrize('text', COURSE_QUERIES)
+def test_course_query_uses_index(app, text):
+    with app.app_context():
+        # 与课程列表页相同：按课程ID键集分页，每页多取一条判断是否有下一页
+        statement = db.select(Course).where(*search.parse_course_query(text)).order_by(Course.course_id).limit(11)
+        plan = query_plan(statement)
+        assert not [step for step in plan if TABLE_SCAN.match(step)], plan
+
+
+def test_student_search_orders_by_relevance(app):
+    """全文搜索按bm25相关度排序（相关度相同时按rowid），学生表按rowid逐条读取"""
+    with app.app_context():
+        if not search.fts_available:
+            pytest.skip('SQLite未编译FTS5或不支持trigram分词')
+        query = search.search_students('计算机')
+        expected = db.session.execute(db.text(
+            "SELECT student.student_id FROM student_fts JOIN student ON student.rowid = student_fts.rowid "
+            "WHERE student_fts MATCH '\"计算机\"' ORDER BY bm25(student_fts), student_fts.rowid"
+        )).scalars().all()
+        assert expected
+        assert [student.student_id for student in query] == expected
+        assert 'SEARCH student USING INTEGER PRIMARY KEY (rowid=?)' in query_plan(query.limit(11).statement)
+
+
+@pytest.mark.parametrize('keyword', ['计算机', '1'])
+def test_student_search_pages_cover_all_results(app, keyword):
+    """沿下一页游标翻到最后、再沿上一页游标翻回第一页，各页结果不重复、不遗漏"""
+    with app.app_context():
+        expected = [student.student_id for student in search.search_students(keyword)]
+        pages = [OffsetPagination(search.search_students(keyword))]
+        while pages[-1].has_next:
+            pages.append(OffsetPagination(search.search_students(keyword), after=pages[-1].next_cursor))
+        assert len(pages) > 1
+        assert [student.student_id for page in pages for student in page] == expected[:MAX_OFFSET]
+
+        pagination = pages[-1]
+        for page in reversed(pages[:-1]):
+            pagination = OffsetPagination(search.search_students(keyword), before=pagination.prev_cursor)
+            assert pagination.items == page.items
+        assert not pagination.has_prev
+
+
+def test_offset_pagination_stops_at_max_offset(app):
+    """偏移量分页最多翻到 max_offset 条；超过上限或格式错误的游标从第一页开始"""
+    with app.app_context():
+        query = Student.query.order_by(Student.student_id)
+        last = OffsetPagination(query, per_page=10, after=encode_cursor(20), max_offset=30)
+        assert last.has_prev and not last.has_next
+        assert len(last.items) == 10
+        for cursor in (encode_cursor(31), encode_cursor(-10), encode_cursor('10'), 'garbage'):
+            first = OffsetPagination(query, per_page=10, after=cursor, max_offset=30)
+            assert not first.has_prev
+            assert first.items == query.limit(10).all()
+
+
+@pytest.mark.parametrize('text', ['²', '99999999999999999999', 'id>=99999999999999999999', '٣', 'credit=²'])
+def test_course_search_rejects_non_ascii_and_huge_numbers(client, text):
+    """非ASCII数字或超出64位整数范围的数字按名称前缀查找，不报错"""
+    response = client.get('/courses', query_string={'search': text})
+    assert response.status_code == 200
+    assert search.parse_integer(text) is None
+
+
+@pytest.mark.parametrize('text', ['²', '99999999999999999999'])
+def test_course_suggest_rejects_non_ascii_and_huge_numbers(client, text):
+    response = client.get('/api/courses/suggest', query_string={'q': text})
+    assert response.status_code == 200
+    assert response.get_json() == []
+
+
+def test_course_suggest_by_id(app, client):
+    response = client.get('/api/courses/suggest', query_string={'q': '3'})
+    assert response.status_code == 200
+    assert response.get_json()[0]['id'] == 3
@@ -0,0 +1,64 @@
+import sqlite3
+import numpy as np
+import pytest
+from app import counters, db
+from app.models import Score
+from app.sketch import RESOLUTION, load_histograms, score_to_bin
+from derived_tables import BIN_SQL
+
+QUANTILES = [0, 0.1, 0.25, 0.5, 0.75, 0.9, 1]
+
+
+def course_scores():
+    """直接读取成绩表，按课程分组返回成绩"""
+    scores = {}
+    for course_id, score in db.session.execute(db.select(Score.course_id, Score.score).where(Score.score.isnot(None))):
+        scores.setdefault(course_id, []).append(score)
+    return scores
+
+
+def assert_quantiles_match():
+    """各课程直方图的分位数与numpy.quantile（线性插值）相差不超过一个箱宽"""
+    histograms = load_histograms()
+    scores = course_scores()
+    assert scores
+    assert set(histograms) == set(scores)
+    for course_id, values in scores.items():
+        histogram = histograms[course_id]
+        assert histogram.total == len(values)
+        np.testing.assert_allclose(histogram.quantiles(QUANTILES), np.quantile(values, QUANTILES), atol=RESOLUTION)
+
+
+def test_quantiles_match_numpy(app):
+    with app.app_context():
+        assert_quantiles_match()
+
+
+def test_own_writes_update_bins(app):
+    with app.app_context():
+        score = Score.query.filter(Score.score.isnot(None)).first()
+        score.score = 100.0
+        db.session.delete(Score.query.filter(Score.score.isnot(None)).order_by(Score.id.desc()).first())
+        db.session.commit()
+        assert_quantiles_match()
+
+
+def test_external_writes_update_bins(app):
+    """其他进程直接修改数据库（如 data.py）时，分箱计数由触发器同步维护"""
+    with app.app_context():
+        connection = sqlite3.connect(db.engine.url.database)
+        connection.execute("UPDATE score SET score = 0 WHERE course_id = (SELECT MIN(course_id) FROM score)")
+        connection.execute("DELETE FROM score WHERE id = (SELECT MAX(id) FROM score)")
+        connection.commit()
+        connection.close()
+
+        assert_quantiles_match()
+        assert counters.rebuild() == ([], [])
+
+
+@pytest.mark.parametrize('score', [0.05, 0.15, 0.25, 60.05, 72.25, 72.35, 99.95, 100.0, 100.04, -0.04, -3.0, 150.0])
+def test_bins_match_sql(app, score):
+    """Python与触发器对同一成绩（包括恰在两箱之间的值和超出范围的值）得到同一个箱"""
+    with app.app_context():
+        sql = db.text("SELECT " + BIN_SQL.format(':score'))
+        assert db.session.execute(sql, {'score': score}).scalar() == score_to_bin(score)
@@ -0,0 +1,45 @@
+import pytest
+from flask import g
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from app import create_app, db, metrics
+from app.slowlog import MAX_PARAMETER_LENGTH, read_entries, summarize_parameters
+
+
+def test_executemany_logs_row_count_and_first_row():
+    rows = [(index, f'student-{index}') for index in range(5000)]
+    assert summarize_parameters(rows, True) == {'rows': 5000, 'first': [0, 'student-0']}
+    assert summarize_parameters([], True) == {'rows': 0, 'first': None}
+
+
+def test_long_values_are_truncated():
+    summary = summarize_parameters(('x' * 10000, b'\x00' * 64, 3), False)
+    assert summary[0].startswith('x' * MAX_PARAMETER_LENGTH)
+    assert len(summary[0]) < MAX_PARAMETER_LENGTH + 20
+    assert summary[1:] == ['<64 bytes>', 3]
+    assert summarize_parameters({'name': 'y' * 10000}, False)['name'].startswith('y' * MAX_PARAMETER_LENGTH)
+
+
+def test_metrics_and_slow_log_share_one_timing_listener(tmp_path):
+    """请求统计与慢查询日志读取同一个开始时间；执行失败的语句不影响后续语句的计时"""
+    log = tmp_path / 'slow.jsonl'
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}", 'TESTING': True,
+                      'SLOW_QUERY_MS': 0, 'SLOW_QUERY_LOG': str(log)})
+    with app.app_context():
+        # 请求统计和慢查询日志都已注册，但每个引擎（主连接、只读连接）上记录开始时间的监听器只有一个
+        for engine in db.engines.values():
+            assert event.contains(engine, 'before_cursor_execute', metrics._before_cursor_execute)
+            assert len(engine.dispatch.before_cursor_execute) == 1
+
+    with app.test_request_context('/'):
+        app.preprocess_request()
+        with pytest.raises(OperationalError):
+            db.session.execute(db.text('SELECT * FROM no_such_table'))
+        db.session.rollback()
+        for _ in range(3):
+            db.session.execute(db.text('SELECT count(*) FROM student')).scalar()
+        stats = g.request_stats
+
+    entries = list(read_entries(str(log)))
+    assert stats.queries == len(entries) == 3
+    assert sum(entry['duration_ms'] for entry in entries) == pytest.approx(stats.db_time * 1000, abs=0.01)
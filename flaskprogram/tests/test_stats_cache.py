@@ -0,0 +1,25 @@
+from app import cache, db, stats_cache
+from app.models import DataVersion
+
+
+def test_etag_survives_process_restart(client):
+    """ETag中的数据库标识保存在data_version表中，清空进程内状态（相当于其他工作进程或重启后）仍返回304"""
+    response = client.get('/api/stats/distribution')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    stats_cache.clear()
+    response = client.get('/api/stats/distribution', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+
+def test_install_version_adds_token_to_old_database(app):
+    """旧数据库的data_version表没有token列时补建该列并生成数据库标识"""
+    with app.app_context():
+        db.session.execute(db.text("ALTER TABLE data_version DROP COLUMN token"))
+        db.session.commit()
+        cache.install_version()
+        token = db.session.get(DataVersion, cache.VERSION_ID).token
+    stats_cache.clear()
+    assert token
@@ -0,0 +1,32 @@
+import io
+import zipfile
+import pytest
+from app import db, transcripts
+from app.models import Student
+
+
+@pytest.mark.parametrize('student_id, name, expected', [
+    ('2021001', '张三', '2021001_张三.pdf'),
+    ('2021002', '../../etc/passwd', '2021002_.._.._etc_passwd.pdf'),
+    ('2021003', 'a\\b:c*?"<>|', '2021003_a_b_c______.pdf'),
+    ('..', '/', '..__.pdf'),
+])
+def test_transcript_filename_is_a_plain_name(student_id, name, expected):
+    filename = transcripts.transcript_filename({'student_id': student_id, 'name': name})
+    assert filename == expected
+    assert '/' not in filename and '\\' not in filename
+
+
+def test_download_renders_in_request_without_process_pool(client, monkeypatch):
+    """网页下载逐份生成成绩单，不为请求启动进程池"""
+    def no_pool(*args, **kwargs):
+        raise AssertionError('网页请求不应启动进程池')
+    monkeypatch.setattr(transcripts, 'ProcessPoolExecutor', no_pool)
+
+    with client.application.app_context():
+        class_ = db.session.execute(db.select(Student.class_).limit(1)).scalar()
+        count = transcripts.count_transcripts(class_=class_)
+    response = client.get('/transcripts.zip', query_string={'class': class_})
+    assert response.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(response.data)) as archive:
+        assert len(archive.namelist()) == count